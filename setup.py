@@ -122,6 +122,17 @@ setup(
     package_dir={'': 'src'},
 
     install_requires = ['paramiko==2.4.2', 'apache-libcloud==2.3.0', 'benchsuite.core'],
+
+    entry_points = {
+        'benchsuite.parsers': [
+            'webframeworks = benchsuite.stdlib.benchmark.parsers:WebFrameworksBenchmarksParser',
+            'ycsb = benchsuite.stdlib.benchmark.parsers:YCSBResultParser',
+            'filebench = benchsuite.stdlib.benchmark.parsers:FileBenchResultParser',
+            'dacapo = benchsuite.stdlib.benchmark.parsers:DaCapoResultParser',
+            'sysbench = benchsuite.stdlib.benchmark.parsers:SysbenchResultParser',
+            'iperf = benchsuite.stdlib.benchmark.parsers:IPerfResultParser'
+        ]
+    },
     setup_requires = ['appdirs'],
 
     cmdclass = cmdclass
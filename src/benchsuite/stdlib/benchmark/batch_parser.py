@@ -0,0 +1,144 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from benchsuite.stdlib.benchmark.parser_registry import get_parser
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_chunk(chunk):
+    """
+    parses a chunk of records in a worker process. Exceptions are not
+    propagated, but returned with the result of each record
+    """
+    res = []
+    for r in chunk:
+        start = time.process_time()
+        try:
+            metrics = get_parser(r['parser']).get_metrics(r.get('tool'), r.get('workload'), r['logs'])
+            error = None
+        except Exception as ex:
+            metrics = None
+            error = '{0}: {1}'.format(ex.__class__.__name__, str(ex))
+        size = sum([len(l.get('stdout') or '') + len(l.get('stderr') or '') for l in r['logs']])
+        res.append((r.get('id'), r['parser'], metrics, error, time.process_time() - start, size))
+    return res
+
+
+class BatchParser:
+    """
+    parses again the logs of many executions (e.g. after a parser has been
+    fixed or improved) distributing them on a pool of processes.
+
+    Each record is a dictionary with:
+    - parser: the name of the parser (see ParserRegistry)
+    - tool, workload: the ids passed to the parser
+    - logs: the list of {'vm', 'stdout', 'stderr'} returned by
+      collect_results (stdout and stderr must be strings)
+    - id: an optional identifier of the record, returned with the result
+
+    The records are sent to the workers in chunks of chunk_size and the
+    results are returned as soon as a chunk completes, so the records can be
+    read lazily (e.g. from a database cursor).
+
+    The statistics of each parser are collected in the stats attribute:
+    parse_time is the cpu time spent by the workers in the parser, while
+    throughput is the number of executions parsed per second of wall-clock
+    time since the start of parse(). elapsed and throughput are the
+    wall-clock time and the executions per second of the whole batch
+    """
+
+    def __init__(self, max_workers=None, chunk_size=100, max_pending_chunks=None):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks
+        self.stats = {}
+        self.elapsed = 0.0
+        self.throughput = 0.0
+        self.__start = None
+
+    def parse(self, records):
+        """
+        :return: a generator of dictionaries {'id', 'parser', 'metrics',
+        'error'}, in order of completion. error is None if the parsing
+        succeeded, otherwise it contains the exception raised by the parser
+        """
+        records = iter(records)
+        self.__start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            # the pending chunks are limited, so that the records are not
+            # read all at once
+            max_pending = self.max_pending_chunks or 2 * (self.max_workers or os.cpu_count() or 1)
+            pending = set()
+            exhausted = False
+
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    chunk = self.__next_chunk(records)
+                    if chunk:
+                        pending.add(pool.submit(_parse_chunk, chunk))
+                    else:
+                        exhausted = True
+
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    for r in f.result():
+                        yield self.__add_result(*r)
+
+        self.elapsed = time.perf_counter() - self.__start
+        executions = sum([s['executions'] for s in self.stats.values()])
+        self.throughput = executions / self.elapsed if self.elapsed else 0.0
+
+        for parser, s in self.stats.items():
+            s['throughput'] = s['executions'] / self.elapsed if self.elapsed else 0.0
+            logger.info('{0}: {1} executions parsed ({2} failed), {3:.2f}s of cpu time'.format(
+                parser, s['executions'], s['failures'], s['parse_time']))
+        logger.info('Batch parsing of {0} executions completed in {1:.2f}s ({2:.1f} executions/s)'.format(
+            executions, self.elapsed, self.throughput))
+
+    def __next_chunk(self, records):
+        chunk = []
+        for r in records:
+            chunk.append(r)
+            if len(chunk) >= self.chunk_size:
+                break
+        return chunk
+
+    def __add_result(self, id, parser, metrics, error, elapsed, size):
+        s = self.stats.setdefault(parser, {
+            'executions': 0, 'failures': 0, 'parse_time': 0.0, 'bytes': 0, 'throughput': 0.0})
+        s['executions'] += 1
+        s['parse_time'] += elapsed
+        s['bytes'] += size
+        wall_time = time.perf_counter() - self.__start
+        s['throughput'] = s['executions'] / wall_time if wall_time else 0.0
+        if error:
+            s['failures'] += 1
+            logger.warning('Parsing of execution {0} with {1} failed: {2}'.format(id, parser, error))
+
+        return {'id': id, 'parser': parser, 'metrics': metrics, 'error': error}
@@ -0,0 +1,213 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import configparser
+import glob
+import hashlib
+import json
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+
+# increase when the format of the cache changes
+CACHE_VERSION = 1
+
+
+def get_default_cache_file():
+    from appdirs import user_cache_dir
+    return os.path.join(user_cache_dir('benchmarking-suite', None), 'workload-catalog.json')
+
+
+def get_default_benchmarks_folder():
+    # where the setup installs the configuration files of the stdlib
+    from appdirs import user_config_dir
+    return os.path.join(user_config_dir('benchmarking-suite'), 'benchmarks')
+
+
+def get_default_catalog():
+    """
+    the catalog of the benchmarks installed in the default configuration
+    folder, with the index cached in the default cache file
+    """
+    return WorkloadCatalog([get_default_benchmarks_folder()], cache_file=get_default_cache_file())
+
+
+class WorkloadCatalog:
+    """
+    an index of the workloads defined in the benchmarks configuration files
+    (<tool>.conf) of one or more folders. If a tool is defined in more
+    folders, the first folder wins.
+
+    Each file is parsed only once: the DEFAULT section is stored once per
+    tool and each workload keeps only the keys it overrides. The workloads
+    are indexed by tool, name and category and the index is cached in
+    cache_file, so that the files are parsed again only if their
+    modification time and content change.
+
+    The benchmarks created by get_benchmark share the DEFAULT section of
+    their tool (see BashCommandBenchmark.load_from_config_file). The catalog
+    is used by the FanOutScheduler; the controller of benchsuite.core loads
+    each benchmark with its own configuration reader, that is not pluggable
+    from this package
+    """
+
+    def __init__(self, folders, cache_file=None):
+        self.folders = folders
+        self.cache_file = cache_file
+        self.__tools = None
+        self.__configs = {}
+
+    def list_tools(self):
+        return sorted(self.__get_tools().keys())
+
+    def list_workloads(self, tool=None, category=None):
+        """
+        :return: the workloads (dictionaries with tool, workload, tool_name,
+        workload_name, categories and description) of the tool and/or of
+        the category (case insensitive)
+        """
+        tools = self.__get_tools()
+        res = []
+        for t in [tool] if tool else sorted(tools.keys()):
+            if t not in tools:
+                continue
+            for w in tools[t]['index']:
+                if category and category.lower() not in [c.lower() for c in w['categories']]:
+                    continue
+                res.append(w)
+        return res
+
+    def get_workload(self, tool, workload):
+        for w in self.list_workloads(tool=tool):
+            if w['workload'] == workload:
+                return w
+        return None
+
+    def get_config(self, tool):
+        """
+        :return: the ConfigParser of the tool, built from the parsed
+        sections (and kept in memory). The values are interpolated when they
+        are read
+        """
+        if tool not in self.__configs:
+            entry = self.__get_tools()[tool]
+            config = configparser.ConfigParser()
+            config.read_dict({'DEFAULT': entry['defaults']})
+            config.read_dict(entry['sections'])
+            self.__configs[tool] = config
+        return self.__configs[tool]
+
+    def get_benchmark(self, tool, workload):
+        """
+        creates the benchmark with the class specified in the configuration
+        file (the same done by benchsuite.core load_benchmark_from_config_file)
+        """
+        config = self.get_config(tool)
+        module_name, class_name = config['DEFAULT']['class'].rsplit('.', 1)
+        __import__(module_name)
+        clazz = getattr(sys.modules[module_name], class_name)
+        return clazz.load_from_config_file(config, tool, workload)
+
+    def __get_tools(self):
+        if self.__tools is not None:
+            return self.__tools
+
+        cache = self.__load_cache()
+        tools = {}
+        for folder in self.folders:
+            for f in sorted(glob.glob(os.path.join(folder, '*.conf'))):
+                tool = os.path.splitext(os.path.basename(f))[0]
+                if tool not in tools:
+                    tools[tool] = self.__get_entry(f, tool, cache.get(f))
+
+        files = {t['file']: t for t in tools.values()}
+        if self.cache_file and files != cache:
+            self.__save_cache(files)
+
+        self.__tools = tools
+        return tools
+
+    def __get_entry(self, file, tool, cached):
+        mtime = os.path.getmtime(file)
+        if cached and cached['mtime'] == mtime:
+            return cached
+
+        with open(file, 'rb') as f:
+            content = f.read()
+        sha = hashlib.sha256(content).hexdigest()
+
+        if cached and cached['sha256'] == sha:
+            return dict(cached, mtime=mtime)
+
+        logger.debug('Parsing benchmark configuration file %s', file)
+        entry = self.__parse(content.decode('utf-8'), tool)
+        entry.update({'file': file, 'mtime': mtime, 'sha256': sha})
+        return entry
+
+    @staticmethod
+    def __parse(content, tool):
+        # the raw values are stored, only the ones of the index are
+        # interpolated (when they are read)
+        config = configparser.ConfigParser()
+        config.read_string(content)
+        defaults = dict(config.defaults())
+
+        # only the keys overridden by the workloads are stored
+        sections = {}
+        for s in config.sections():
+            sections[s] = {k: v for k, v in config.items(s, raw=True) if defaults.get(k) != v}
+
+        index = []
+        for s in config.sections():
+            categories = config[s].get('categories')
+            index.append({
+                'tool': tool,
+                'workload': s,
+                'tool_name': config[s].get('tool_name'),
+                'workload_name': config[s].get('workload_name'),
+                'categories': [c.strip() for c in categories.split(',') if c.strip()] if categories else [],
+                'description': config[s].get('workload_description') or config[s].get('description')
+            })
+
+        return {'defaults': defaults, 'sections': sections, 'index': index}
+
+    def __load_cache(self):
+        if not self.cache_file or not os.path.isfile(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+            if cache.get('version') == CACHE_VERSION:
+                return cache['files']
+        except (ValueError, KeyError, OSError) as ex:
+            logger.warning('Cannot read the workload catalog cache {0}: {1}'.format(self.cache_file, str(ex)))
+        return {}
+
+    def __save_cache(self, files):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = '{0}.{1}.tmp'.format(self.cache_file, os.getpid())
+            with open(tmp, 'w') as f:
+                json.dump({'version': CACHE_VERSION, 'files': files}, f)
+            os.replace(tmp, self.cache_file)
+        except OSError as ex:
+            logger.warning('Cannot write the workload catalog cache {0}: {1}'.format(self.cache_file, str(ex)))
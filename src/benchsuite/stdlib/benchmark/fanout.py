@@ -0,0 +1,268 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import configparser
+import json
+import logging
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchsuite.core.model.exception import ProviderConfigurationException
+from benchsuite.core.model.provider import load_provider_from_config
+from benchsuite.core.model.session import BenchmarkingSession
+from benchsuite.stdlib.benchmark.catalog import get_default_catalog
+from benchsuite.stdlib.benchmark.sweep import SweepScheduler
+from benchsuite.stdlib.execution.vm_environment import VMSetExecutionEnvironmentRequest
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderQuota:
+    """
+    the resources that the executions on a provider can use at the same
+    time. None means unlimited
+    """
+
+    resources = ['vms', 'vcpus', 'floating_ips', 'sessions']
+
+    def __init__(self, max_vms=None, max_vcpus=None, max_floating_ips=None, max_sessions=None):
+        self.limits = {'vms': max_vms, 'vcpus': max_vcpus,
+                       'floating_ips': max_floating_ips, 'sessions': max_sessions}
+
+    @staticmethod
+    def load_from_config(config):
+        """
+        reads the quota.max_vms, quota.max_vcpus, quota.max_floating_ips and
+        quota.max_sessions parameters of the provider section. The existing
+        vms are shared by all the sessions, so by default only one session
+        at a time runs on them
+        """
+        provider = config['provider']
+        args = {}
+        for r in ProviderQuota.resources:
+            v = provider.get('quota.max_' + r)
+            if v:
+                args['max_' + r] = int(v)
+
+        if 'max_sessions' not in args and provider.get('class', '').endswith('.ExistingVMProvider'):
+            args['max_sessions'] = 1
+
+        return ProviderQuota(**args)
+
+    def exceeds(self, demand):
+        return any([l is not None and demand[r] > l for r, l in self.limits.items()])
+
+    def fits(self, usage, demand):
+        return all([l is None or usage[r] + demand[r] <= l for r, l in self.limits.items()])
+
+
+class FanOutScheduler:
+    """
+    executes a matrix of (provider configuration, service type, tool,
+    workload) cells, running the sessions of different providers and service
+    types concurrently.
+
+    The cells with the same provider configuration and service type are
+    executed in the same session with a SweepScheduler (split in sessions of
+    at most workloads_per_session workloads, if set). At most max_workers
+    sessions run at the same time and a session starts only if the vms, the
+    vcpus and the floating ips it needs fit the quota of its provider (see
+    ProviderQuota). The vcpus of a service type are read from its "vcpus"
+    parameter, if any.
+
+    The provisioning of the vms is retried up to provisioning_retries times
+    (waiting retry_period seconds more at each attempt), unless the error is
+    in the configuration of the provider.
+
+    The results are returned as soon as each cell completes
+    """
+
+    def __init__(self, catalog=None, max_workers=4, quotas=None, workloads_per_session=None,
+                 provisioning_retries=2, retry_period=30, on_result=None):
+        """
+        :param catalog: the WorkloadCatalog used to load the benchmarks (by
+        default, the one of the installed benchmarks, see get_default_catalog)
+        :param quotas: a dictionary provider name -> ProviderQuota that
+        overrides the quota in the provider configuration
+        :param on_result: a function on_result(execution, result) called
+        with the ExecutionResult of each cell (e.g. to store it)
+        """
+        self.catalog = catalog or get_default_catalog()
+        self.max_workers = max_workers
+        self.quotas = quotas or {}
+        self.workloads_per_session = workloads_per_session
+        self.provisioning_retries = provisioning_retries
+        self.retry_period = retry_period
+        self.on_result = on_result
+
+    def run(self, cells):
+        """
+        :param cells: an iterable of tuples (provider configuration file,
+        service type, tool, workload)
+        :return: a generator of dictionaries with provider, service_type,
+        tool, workload, execution, result, phase and error (see
+        SweepScheduler.run). Failed provisionings are returned with phase
+        "provision"
+        """
+        tasks = self.__get_tasks(cells)
+        quotas = {}
+        usage = {}
+        for t in tasks:
+            if t['provider'] not in quotas:
+                quotas[t['provider']] = self.quotas.get(t['provider']) or ProviderQuota.load_from_config(t['config'])
+                usage[t['provider']] = {r: 0 for r in ProviderQuota.resources}
+
+        pending = []
+        for t in tasks:
+            if quotas[t['provider']].exceeds(t['demand']):
+                ex = ProviderConfigurationException('Session needs {0}, more than the quota of {1}'.format(
+                    t['demand'], t['provider']))
+                for b in t['benchmarks']:
+                    yield self.__get_error(t, b, 'provision', ex)
+            else:
+                pending.append(t)
+
+        results = queue.Queue()
+        running = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                # the sessions are started in order, skipping the ones that do
+                # not fit the quota of their provider at the moment
+                for t in list(pending):
+                    if running >= self.max_workers:
+                        break
+                    if quotas[t['provider']].fits(usage[t['provider']], t['demand']):
+                        for r in ProviderQuota.resources:
+                            usage[t['provider']][r] += t['demand'][r]
+                        pending.remove(t)
+                        running += 1
+                        pool.submit(self.__run_task, t, results)
+
+                kind, item = results.get()
+                if kind == 'done':
+                    running -= 1
+                    for r in ProviderQuota.resources:
+                        usage[item['provider']][r] -= item['demand'][r]
+                else:
+                    yield item
+
+    def __get_tasks(self, cells):
+        sessions = {}
+        configs = {}
+        for config_file, service_type, tool, workload in cells:
+            if config_file not in configs:
+                configs[config_file] = self.__read_config(config_file)
+            sessions.setdefault((config_file, service_type), []).append(
+                self.catalog.get_benchmark(tool, workload))
+
+        tasks = []
+        for (config_file, service_type), benchmarks in sessions.items():
+            config = configs[config_file]
+            size = self.workloads_per_session or len(benchmarks)
+            for i in range(0, len(benchmarks), size):
+                chunk = benchmarks[i:i + size]
+                tasks.append({
+                    'config': config,
+                    'provider': config['provider']['name'],
+                    'service_type': service_type,
+                    'benchmarks': chunk,
+                    'vm_list': self.__get_vm_list(chunk),
+                    'demand': self.__get_demand(config, service_type, chunk)})
+        return tasks
+
+    @staticmethod
+    def __read_config(config_file):
+        # the same formats of load_service_provider_from_config_file
+        config = configparser.ConfigParser()
+        try:
+            with open(config_file) as f:
+                config.read_dict(json.load(f))
+        except ValueError:
+            config = configparser.ConfigParser()
+            config.read(config_file)
+        return config
+
+    @staticmethod
+    def __get_vm_list(benchmarks):
+        res = []
+        for b in benchmarks:
+            res.extend([n for n in b._props['vm_list'] if n not in res])
+        return res
+
+    def __get_demand(self, config, service_type, benchmarks):
+        vms = len(self.__get_vm_list(benchmarks))
+        provider = config['provider']
+        service = config[service_type] if service_type in config else {}
+        floating_ips = provider.get('driver') == 'openstack' and \
+            provider.get('benchsuite.openstack.no_floating_ip') != 'true'
+        return {'vms': vms,
+                'vcpus': vms * int(service.get('vcpus', 0)),
+                'floating_ips': vms if floating_ips else 0,
+                'sessions': 1}
+
+    def __run_task(self, task, results):
+        session = None
+        phase = 'provision'
+        try:
+            session = BenchmarkingSession(load_provider_from_config(task['config'], task['service_type']))
+            self.__provision(session, task)
+
+            phase = None
+            for r in SweepScheduler(session, on_result=self.on_result).run(task['benchmarks']):
+                r.update({'provider': task['provider'], 'service_type': task['service_type']})
+                results.put(('result', r))
+
+        except Exception as ex:
+            # the cells already completed have been returned
+            logger.error('Session on {0}/{1} failed: {2}'.format(task['provider'], task['service_type'], str(ex)))
+            if phase:
+                for b in task['benchmarks']:
+                    results.put(('result', self.__get_error(task, b, phase, ex)))
+
+        finally:
+            if session:
+                try:
+                    session.destroy()
+                except Exception as ex:
+                    logger.error('Error destroying the session on {0}/{1}: {2}'.format(
+                        task['provider'], task['service_type'], str(ex)))
+            results.put(('done', task))
+
+    def __provision(self, session, task):
+        request = VMSetExecutionEnvironmentRequest(task['vm_list'])
+        for attempt in range(self.provisioning_retries + 1):
+            try:
+                return session.get_execution_environment(request)
+            except (ProviderConfigurationException, AssertionError):
+                raise
+            except Exception as ex:
+                if attempt >= self.provisioning_retries:
+                    raise
+                wait = self.retry_period * (attempt + 1)
+                logger.warning('Provisioning on {0}/{1} failed ({2}). Retrying in {3} seconds'.format(
+                    task['provider'], task['service_type'], str(ex), wait))
+                time.sleep(wait)
+
+    @staticmethod
+    def __get_error(task, benchmark, phase, ex):
+        return {'provider': task['provider'], 'service_type': task['service_type'],
+                'tool': benchmark.tool_id, 'workload': benchmark.workload_id, 'execution': None,
+                'result': None, 'phase': phase, 'error': ex}
@@ -0,0 +1,112 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import logging
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+# the entry points group where other packages can register their parsers
+ENTRY_POINTS_GROUP = 'benchsuite.parsers'
+
+
+class ParserRegistry:
+    """
+    resolves the parsers referenced in the benchmarks configuration, either
+    with the full name of the class (e.g.
+    "benchsuite.stdlib.benchmark.parsers.YCSBResultParser") or with a name
+    registered in the "benchsuite.parsers" entry points group or with
+    register().
+
+    Each class is resolved only once and a single instance is shared by all
+    the benchmarks that use it, so the parsers must not keep state between
+    the calls of get_metrics
+    """
+
+    def __init__(self):
+        self.__classes = {}
+        self.__instances = {}
+        self.__entry_points = None
+        self.__lock = threading.RLock()
+
+    def register(self, name, parser_class):
+        with self.__lock:
+            self.__classes[name] = parser_class
+            self.__instances.pop(name, None)
+
+    def get_class(self, name):
+        with self.__lock:
+            if name not in self.__classes:
+                self.__classes[name] = self.__resolve(name)
+            return self.__classes[name]
+
+    def get_parser(self, name):
+        """
+        :return: the shared instance of the parser
+        """
+        with self.__lock:
+            if name not in self.__instances:
+                self.__instances[name] = self.get_class(name)()
+            return self.__instances[name]
+
+    def __resolve(self, name):
+        if '.' in name:
+            module_name, class_name = name.rsplit('.', 1)
+            try:
+                __import__(module_name)
+            except ModuleNotFoundError as ex:
+                # only if the module (or one of its packages) does not exist.
+                # The errors raised while importing it are not hidden
+                if not ex.name or not (module_name + '.').startswith(ex.name + '.'):
+                    raise
+                logger.debug('Parser %s is not a class name (%s). Searching it in the entry points', name, str(ex))
+            else:
+                parser_class = getattr(sys.modules[module_name], class_name, None)
+                if parser_class is not None:
+                    return parser_class
+                logger.debug('Parser %s is not a class name (%s has no attribute %s). '
+                             'Searching it in the entry points', name, module_name, class_name)
+
+        entry_point = self.__get_entry_points().get(name)
+        if not entry_point:
+            raise ValueError('Parser {0} not found'.format(name))
+
+        logger.debug('Loading parser %s from entry point %s', name, entry_point)
+        return entry_point.load()
+
+    def __get_entry_points(self):
+        if self.__entry_points is None:
+            # pkg_resources takes long to import, so it is imported only if
+            # a parser is not a class name
+            import pkg_resources
+            self.__entry_points = {ep.name: ep for ep in pkg_resources.iter_entry_points(ENTRY_POINTS_GROUP)}
+        return self.__entry_points
+
+
+_registry = ParserRegistry()
+
+
+def get_parser_registry():
+    return _registry
+
+
+def get_parser(name):
+    return _registry.get_parser(name)
@@ -20,6 +20,8 @@ import json
 import logging
 
 import re
+import statistics
+from array import array
 
 from benchsuite.core.model.execution import ExecutionResultParser
 
@@ -27,65 +29,252 @@ from benchsuite.core.model.execution import ExecutionResultParser
 logger = logging.getLogger(__name__)
 
 
+def iter_lines(log):
+    """
+    iterates over the lines (without the line terminator) of a log. The log
+    can be either a string or a file-like object (e.g. the ones returned by
+    RemoteSSHExecutor.collect_results(stream=True)). Strings are not split in
+    a list, to avoid copying the whole log
+    """
+    if isinstance(log, str):
+        start = 0
+        end = log.find('\n')
+        while end >= 0:
+            yield log[start:end]
+            start = end + 1
+            end = log.find('\n', start)
+        yield log[start:]
+    else:
+        for l in log:
+            yield l[:-1] if l.endswith('\n') else l
+
+
+def percentile(sorted_values, p):
+    """
+    the p-th percentile of a sorted list of values, interpolating between the
+    closest ranks
+    """
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100.0
+    f = int(k)
+    if f + 1 >= len(sorted_values):
+        return sorted_values[-1]
+    return sorted_values[f] + (sorted_values[f + 1] - sorted_values[f]) * (k - f)
+
+
+def get_percentile_name(p):
+    """
+    e.g. 99 -> "p99", 99.9 -> "p99_9"
+    """
+    return 'p' + '{0:g}'.format(p).replace('.', '_')
+
+
+def get_distribution_metrics(name, values, unit, percentiles=(50, 95, 99), suffix=None):
+    """
+    the min, the max and the percentiles of a list of values, as metrics
+    named "<name>_<min|max|pNN>[_<suffix>]"
+    """
+    if not values:
+        return {}
+
+    values = sorted(values)
+    suffix = '_' + suffix if suffix else ''
+    res = {
+        name + '_min' + suffix: {'value': values[0], 'unit': unit},
+        name + '_max' + suffix: {'value': values[-1], 'unit': unit}
+    }
+    for p in percentiles:
+        res['{0}_{1}{2}'.format(name, get_percentile_name(p), suffix)] = {'value': percentile(values, p), 'unit': unit}
+    return res
 
-class WebFrameworksBenchmarksParser(ExecutionResultParser):
-
-    def get_metrics(self, tool, workload, logs):
 
-        stdout = logs[0]['stdout']
+class WebFrameworksBenchmarksParser(ExecutionResultParser):
+    """
+    parses the results.json file produced by the FrameworkBenchmarks tool.
+    The metrics of all the frameworks and the tests in the file are returned:
+    if the file contains a single framework and test they are named
+    "<metric>_<iteration>", otherwise "<framework>_<test>_<metric>_<iteration>".
+    The latencies are converted in ms
+    """
+
+    start_marker = '@@@ results.json content @@@'
+
+    end_marker = '@@@@@@'
+
+    # the parameter of the iterations of each test. The first key found in
+    # the results is used (older versions of the tool do not write
+    # cachedQueryIntervals) and concurrencyLevels is used for the tests not
+    # listed or if none of the keys is found
+    iterations_keys = {
+        'query': ['queryIntervals'],
+        'update': ['queryIntervals'],
+        'cached_query': ['cachedQueryIntervals', 'queryIntervals'],
+        'plaintext': ['pipelineConcurrencyLevels']
+    }
 
-        # the tool puts the results in the results.json file. This file is
-        # printed in the stdout and delimited by the
-        # "@@@ results.json content @@@" and "@@@@@@" lines. We isolate the
-        # content of the file and parse it in a json object
-        lines = stdout.split('\n')
-        start = lines.index('@@@ results.json content @@@') + 2
-        end = lines.index('@@@@@@')
-        results_str = '\n'.join(lines[start:end])
-        results = json.loads(results_str)
+    value_unit_pattern = re.compile(r'^\s*(\d*\.\d+|\d+)\s*([a-z]*)\s*$')
 
-        # find the framework and the test executed
-        framework = results['frameworks'][0]
-        test = list(results['verify'][framework].keys())[0]
+    # factors to convert the times in ms
+    time_units = {'us': 0.001, 'ms': 1, 's': 1000, 'm': 60000, 'h': 3600000}
 
-        data = results['rawData'][test][framework]
-        iterations = results['concurrencyLevels']
+    def get_metrics(self, tool, workload, logs):
 
-        if test == 'update' or test == 'query':
-            iterations = results['queryIntervals']
+        results = self.get_results(logs[0]['stdout'])
 
-        if test == 'plaintext':
-            iterations = results['pipelineConcurrencyLevels']
+        data = [(test, framework, rows)
+                for test, frameworks in results['rawData'].items() if isinstance(frameworks, dict)
+                for framework, rows in frameworks.items() if rows and isinstance(rows, list)]
 
         metrics = {}
-        c = 0
-        for res in data:
-            iter = iterations[c]
-            metrics.update({'totalRequests_{0}'.format(iter): {'value': res['totalRequests'], 'unit':'num'}})
-            if 'timeout' in res:
-                metrics.update({'timeout_{0}'.format(iter): {'value': res['timeout'], 'unit':'num'}})
-            metrics.update({'duration_{0}'.format(iter): {'value': res['endTime'] - res['startTime'], 'unit':'s'}})
-            metrics.update({'latencyAvg_{0}'.format(iter): self.__split_value_unit(res['latencyAvg'])})
-            metrics.update({'latencyMax_{0}'.format(iter): self.__split_value_unit(res['latencyMax'])})
-            metrics.update({'latencyStdev_{0}'.format(iter): self.__split_value_unit(res['latencyStdev'])})
-            c+=1
+        for test, framework, rows in data:
+            prefix = '' if len(data) == 1 else '{0}_{1}_'.format(framework, test)
+            iterations = self.__get_iterations(results, test)
+            for iter, res in zip(iterations, rows):
+                metrics.update(self.__get_iteration_metrics(prefix, iter, res))
 
         return metrics
 
+    def __get_iterations(self, results, test):
+        for k in self.iterations_keys.get(test, []) + ['concurrencyLevels']:
+            if k in results:
+                return results[k]
+        logger.warning('Iterations of test %s not found in the results. Ignoring it', test)
+        return []
+
+    def get_results(self, stdout):
+        """
+        the tool puts the results in the results.json file. This file is
+        printed in the stdout and delimited by the
+        "@@@ results.json content @@@" and "@@@@@@" lines.
+
+        The lines of the file are buffered while the output is read and the
+        buffer is decoded as soon as the object can be complete, i.e. at each
+        line that is not indented and ends with "}", so the rest of the output
+        is not read
+        """
+        decoder = json.JSONDecoder()
+        content = None
+        for l in iter_lines(stdout):
+            if content is None:
+                if l == self.start_marker:
+                    content = []
+                continue
+
+            if l == self.end_marker:
+                break
+
+            content.append(l)
+            if l.endswith('}') and not l[:1].isspace():
+                try:
+                    results, _ = decoder.raw_decode('\n'.join(content).lstrip())
+                    return results
+                except ValueError:
+                    # e.g. a "}" at the beginning of a line of a string
+                    pass
+
+        if content is None:
+            raise ValueError('results.json content not found in the output')
+
+        return json.loads('\n'.join(content))
+
+    def __get_iteration_metrics(self, prefix, iter, res):
+        metrics = {}
+        if 'totalRequests' in res:
+            metrics['{0}totalRequests_{1}'.format(prefix, iter)] = {'value': res['totalRequests'], 'unit': 'num'}
+        if 'timeout' in res:
+            metrics['{0}timeout_{1}'.format(prefix, iter)] = {'value': res['timeout'], 'unit': 'num'}
+        if 'startTime' in res and 'endTime' in res:
+            metrics['{0}duration_{1}'.format(prefix, iter)] = {'value': res['endTime'] - res['startTime'], 'unit': 's'}
+        for k in ['latencyAvg', 'latencyMax', 'latencyStdev']:
+            value = self.__to_ms(res[k]) if k in res else None
+            if value is not None:
+                metrics['{0}{1}_{2}'.format(prefix, k, iter)] = {'value': value, 'unit': 'ms'}
+        return metrics
 
-    def __split_value_unit(self, s):
+    def __to_ms(self, s):
         '''
         values are stored in results.json as string that contain both the value and the unit
         (e.g. "10.23ms", "4.2s", "3.8us")
         :param s: the result string
-        :return:
+        :return: the value in ms or None if it is not a valid time
         '''
-        val = re.findall(r"\d*\.\d+|\d+", s)[0]
-        unit = s.replace(val,'').strip()
-        return {'value': val, 'unit': unit}
+        m = self.value_unit_pattern.match(str(s))
+        if not m or m.group(2) not in self.time_units:
+            logger.warning('Invalid time value "%s". Ignoring it', s)
+            return None
+        return float(m.group(1)) * self.time_units[m.group(2)]
+
+
+class LatencyHistogram:
+    """
+    the latency histogram printed by YCSB with measurementtype=histogram:
+    buckets of 1 ms (counts[i] operations took between i and i+1 ms) plus
+    the operations that took more than len(counts) ms
+    """
+
+    def __init__(self, counts, overflow=0, max_latency=None):
+        self.counts = counts
+        self.overflow = overflow
+        self.max_latency = max_latency
+
+    def get_total(self):
+        return sum(self.counts) + self.overflow
+
+    def get_percentile(self, p):
+        """
+        the p-th percentile of the latency (in us), interpolated inside the
+        bucket. The percentiles that fall in the overflow bucket are
+        approximated with the max latency (if known)
+        """
+        target = self.get_total() * p / 100.0
+        if not target:
+            return None
+
+        cumulative = 0
+        for i, c in enumerate(self.counts):
+            if c and cumulative + c >= target:
+                return (i + (target - cumulative) / c) * 1000
+            cumulative += c
+
+        return self.max_latency if self.max_latency is not None else len(self.counts) * 1000
+
+
+class YCSBReport:
+    """
+    the data parsed from the output of YCSB:
+
+    - summary: operation -> metric -> value (e.g. ['read']['Operations'])
+    - histograms: operation -> LatencyHistogram
+    - timeseries: operation -> (times in ms, average latency in us)
+    - status: (times in seconds, number of operations, throughput in ops/s)
+      from the status lines printed with -s
+    """
+
+    def __init__(self):
+        self.summary = {}
+        self.histograms = {}
+        self.timeseries = {}
+        self.status = (array('d'), array('q'), array('d'))
 
 
 class YCSBResultParser(ExecutionResultParser):
+    """
+    parses the output of YCSB. Besides the summary of each operation, the
+    latency percentiles are computed from the histograms
+    (measurementtype=histogram) or read from the summary (hdrhistogram with
+    hdrhistogram.percentiles) and the statistics of the throughput are
+    computed from the status lines (-s)
+    """
+
+    operations = ['insert', 'read', 'update', 'scan', 'read-modify-write']
+
+    # percentiles computed from the histograms
+    percentiles = [50, 90, 99.9, 99.99]
+
+    percentile_key_pattern = re.compile('^([0-9.]+)(?:st|nd|rd|th)?PercentileLatency\\(us\\)$')
+
+    status_pattern = re.compile(' ([0-9]+) sec: ([0-9]+) operations;(?: ([0-9.]+) current ops/sec;)?')
 
     def get_metrics(self, tool, workload, logs):
 
@@ -96,53 +285,166 @@ class YCSBResultParser(ExecutionResultParser):
         # [INSERT], MaxLatency(us), 14423.0
         # [SCAN], Operations, 4748.0
 
-        stdout = logs[0]['stdout']
+        report = self.parse(logs[0]['stdout'], logs[0].get('stderr'))
 
-        lines = stdout.split('\n')
+        # keep only interesting metrics, do some sanitization of names
+        out = {
+            'ops_throughput': {'value': report.summary['overall']['Throughput(ops/sec)'], 'unit': 'ops/s'}
+        }
 
-        # filter-out all the non-metrics lines
-        metrics_lines = [l for l in lines if l.startswith('[')]
+        for op_type in self.operations:
+            out.update(self.__get_metrics_by_operation_type(report, op_type))
 
-        # parse all the metrics from the output
-        parsed_metrics = {}
-        for l in metrics_lines:
-            m = re.search('^\[(.+)\],\ (.+),\ (.+)$', l)
-            op_type = m.group(1).lower()
-            op_met = m.group(2)
-            met_val = m.group(3)
+        # the throughput of each status interval
+        out.update(get_distribution_metrics(
+            'ops_throughput', list(report.status[2]), 'ops/s', [5, 50, 95]))
 
-            if op_type not in parsed_metrics:
-                parsed_metrics[op_type] = {}
+        return out
+
+    def parse(self, stdout, stderr=None):
+        """
+        parses the output in a single pass. The status lines are printed on
+        stderr
+        """
+        report = YCSBReport()
+        buckets = {}
+
+        for l in iter_lines(stdout):
+            if not l.startswith('['):
+                continue
+
+            fields = l.split(', ', 2)
+            if len(fields) != 3:
+                continue
+            op_type, key, value = fields[0][1:-1].lower(), fields[1], fields[2]
+
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+
+            if key.isdigit() or key[0] == '>':
+                # histogram or time series buckets, distinguished at the end
+                buckets.setdefault(op_type, []).append((key, value))
+            else:
+                report.summary.setdefault(op_type, {})[key] = value
+
+        for op_type, rows in buckets.items():
+            self.__add_buckets(report, op_type, rows)
+
+        if stderr is not None:
+            self.__parse_status(report, stderr)
+
+        return report
+
+    def __add_buckets(self, report, op_type, rows):
+        # the histograms end with the ">N" bucket, the time series do not
+        if rows[-1][0].startswith('>'):
+            max_latency = report.summary.get(op_type, {}).get('MaxLatency(us)')
+            report.histograms[op_type] = LatencyHistogram(
+                array('q', [int(v) for k, v in rows[:-1]]), int(rows[-1][1]), max_latency)
+        else:
+            report.timeseries[op_type] = (
+                array('d', [float(k) for k, v in rows]), array('d', [v for k, v in rows]))
+
+    def __parse_status(self, report, stderr):
+        times, operations, throughput = report.status
+        for l in iter_lines(stderr):
+            if ' sec: ' not in l:
+                continue
+            m = self.status_pattern.search(l)
+            if m and m.group(3):
+                times.append(float(m.group(1)))
+                operations.append(int(m.group(2)))
+                throughput.append(float(m.group(3)))
+
+    def __get_metrics_by_operation_type(self, report, op_type):
+
+        if op_type not in report.summary:
+            return {}
 
-            parsed_metrics[op_type][op_met] = met_val
+        summary = report.summary[op_type]
+        name = op_type.replace('-', '_')
 
-        # keep only interesting metrics, do some sanitization of names
-        out = {
-            'ops_throughput': {'value': float(parsed_metrics['overall']['Throughput(ops/sec)']), 'unit': 'ops/s'}
-        }
+        res = {}
+        for key, metric, unit in [('Operations', 'ops', 'num'),
+                                  ('AverageLatency(us)', 'latency_avg', 'us'),
+                                  ('MinLatency(us)', 'latency_min', 'us'),
+                                  ('MaxLatency(us)', 'latency_max', 'us'),
+                                  ('95thPercentileLatency(us)', 'latency_95', 'us'),
+                                  ('99thPercentileLatency(us)', 'latency_99', 'us')]:
+            if key in summary:
+                res[name + '_' + metric] = {'value': summary[key], 'unit': unit}
+
+        if name + '_ops' in res:
+            res[name + '_ops']['value'] = int(res[name + '_ops']['value'])
+
+        # other percentiles printed by hdrhistogram (e.g. 99.9PercentileLatency(us))
+        for key, value in summary.items():
+            m = self.percentile_key_pattern.match(key)
+            if m and key not in ['95thPercentileLatency(us)', '99thPercentileLatency(us)']:
+                metric = '{0}_latency_{1}'.format(name, get_percentile_name(float(m.group(1))))
+                res[metric] = {'value': value, 'unit': 'us'}
+
+        histogram = report.histograms.get(op_type)
+        if histogram:
+            for p in self.percentiles:
+                metric = '{0}_latency_{1}'.format(name, get_percentile_name(p))
+                if metric not in res:
+                    res[metric] = {'value': histogram.get_percentile(p), 'unit': 'us'}
 
-        out.update(self.__get_metrics_by_operation_type(parsed_metrics, 'insert'))
-        out.update(self.__get_metrics_by_operation_type(parsed_metrics, 'read'))
-        out.update(self.__get_metrics_by_operation_type(parsed_metrics, 'update'))
-        out.update(self.__get_metrics_by_operation_type(parsed_metrics, 'scan'))
+        return res
 
-        return out
+class FileBenchReport:
+    """
+    the data parsed from the output of filebench:
 
-    def __get_metrics_by_operation_type(self, parsed_metrics, op_type):
+    - summary: metric -> value, from the "IO Summary" line
+    - flowops: flowop name -> metric -> value, from the "Per-Operation
+      Breakdown" table
+    - progress: (times in seconds, ops/s) of the periodic statistics
+      printed during the run
+    """
 
-        if op_type not in parsed_metrics:
-            return {}
+    def __init__(self):
+        self.summary = {}
+        self.flowops = {}
+        self.progress = (array('d'), array('d'))
 
-        return {
-            op_type+'_ops': {'value': int(float(parsed_metrics[op_type]['Operations'])), 'unit': 'num'},
-            op_type+'_latency_avg': {'value': float(parsed_metrics[op_type]['AverageLatency(us)']), 'unit': 'us'},
-            op_type+'_latency_min': {'value': float(parsed_metrics[op_type]['MinLatency(us)']), 'unit': 'us'},
-            op_type+'_latency_max': {'value': float(parsed_metrics[op_type]['MaxLatency(us)']), 'unit': 'us'},
-            op_type+'_latency_95': {'value': float(parsed_metrics[op_type]['95thPercentileLatency(us)']), 'unit': 'us'},
-            op_type+'_latency_99': {'value': float(parsed_metrics[op_type]['99thPercentileLatency(us)']), 'unit': 'us'}
-        }
 
 class FileBenchResultParser(ExecutionResultParser):
+    """
+    parses the output of filebench (both the 1.4 and the 1.5 formats): the IO
+    summary, the metrics of each flowop and the throughput over time
+    """
+
+    # the metrics in the IO summary and in the periodic statistics, e.g.
+    # 1.4: "IO Summary: 20567 ops, 685.502 ops/s, (53/58 r/w), 13.8mb/s, 455us cpu/op, 0.2ms latency"
+    # 1.5: "IO Summary: 20567 ops 685.502 ops/s 53/58 rd/wr 13.8mb/s 0.2ms/op"
+    summary_patterns = {
+        'ops': re.compile('([0-9.]+) ops[ ,]'),
+        'ops_throughput': re.compile('([0-9.]+) ops/s'),
+        'throughput': re.compile('([0-9.]+) ?mb/s'),
+        'cputime': re.compile('([0-9.]+) ?us cpu/op'),
+        'latency_avg': re.compile('([0-9.]+) ?ms(?: latency|/op)')
+    }
+
+    # a row of the per-flowop table, e.g.
+    # 1.4: "statfile1   1603ops/s   0.0mb/s   0.2ms/op   125us/op-cpu [0ms - 10ms]"
+    # 1.5: "closefile4  1580ops  53ops/s  0.0mb/s  0.0ms/op [0.00ms - 0.15ms]"
+    flowop_pattern = re.compile(
+        '^(?:[0-9.]+: )?(\\S+)\\s+(?:([0-9]+)ops\\s+)?([0-9.]+)ops/s\\s+([0-9.]+)mb/s\\s+([0-9.]+)ms/op'
+        '(?:\\s+([0-9.]+)us/op-cpu)?(?:\\s+\\[([0-9.]+)ms - ([0-9.]+)ms\\])?')
+
+    flowop_metrics = [('ops', 'num'), ('ops_throughput', 'ops/s'), ('throughput', 'mb/s'),
+                      ('latency_avg', 'ms'), ('cputime', 'us cpu/op'),
+                      ('latency_min', 'ms'), ('latency_max', 'ms')]
+
+    # the periodic statistics start with the time, e.g. "10.001: 1234 ops ..."
+    progress_pattern = re.compile('^\\s*([0-9.]+): [0-9]+ ops')
+
+    units = {'ops': 'num', 'ops_throughput': 'ops/s', 'throughput': 'mb/s',
+             'cputime': 'us cpu/s', 'latency_avg': 'ms'}
 
     def get_metrics(self, tool, workload, logs):
         '''
@@ -152,84 +454,188 @@ class FileBenchResultParser(ExecutionResultParser):
         :return: 
         '''
 
-        stdout = logs[0]['stdout']
-        # isolate the line with the IO Summary
-        lines = stdout.split('\n')
-        summary_line = [l for l in lines if 'IO Summary' in l][0]
-        logger.debug('Extracted IO Summary: %s', summary_line)
-
-        # isolate metrics
-        metrics = re.sub(r'^.*IO Summary:', '', summary_line).split(',')
-
-        # extract metrics
-        n_ops = re.sub(r'ops', '', metrics[0]).strip()
-        logger.debug('ops: %s', n_ops)
+        report = self.parse(logs[0]['stdout'])
 
-        ops_s = re.sub(r'ops/s', '', metrics[1]).strip()
-        logger.debug('ops/s: %s', ops_s)
+        res = {k: {'value': v, 'unit': self.units[k]} for k, v in report.summary.items()}
+        if 'ops' in res:
+            res['ops']['value'] = int(res['ops']['value'])
 
-        throughput = re.sub(r'mb/s','', metrics[3]).strip()
-        logger.debug('throughput (mb/s): %s', throughput)
+        for name, metrics in report.flowops.items():
+            for metric, unit in self.flowop_metrics:
+                if metric in metrics:
+                    value = int(metrics[metric]) if metric == 'ops' else metrics[metric]
+                    res['{0}_{1}'.format(name, metric)] = {'value': value, 'unit': unit}
 
-        speed = re.sub(r'us\ cpu/op', '', metrics[4]).strip()
-        logger.debug('cpu time (us cpu/s): %s', speed)
+        res.update(get_distribution_metrics(
+            'ops_throughput', list(report.progress[1]), 'ops/s', [5, 50, 95]))
 
-        latency = re.sub(r'ms\ latency', '', metrics[5]).strip()
-        logger.debug('latency (ms): %s', latency)
+        return res
 
-        return {
-            'ops': {'value': int(float(n_ops)), 'unit': 'num'},
-            'ops_throughput': {'value': float(ops_s), 'unit': 'ops/s'},
-            'throughput': {'value': float(throughput), 'unit': 'mb/s'},
-            'cputime': {'value': float(speed), 'unit': 'us cpu/s'},
-            'latency_avg': {'value': float(latency), 'unit': 'ms'}
-        }
+    def parse(self, stdout):
+        """
+        parses the output in a single pass
+        """
+        report = FileBenchReport()
+        in_flowops = False
+
+        for l in iter_lines(stdout):
+            if 'IO Summary' in l:
+                logger.debug('Extracted IO Summary: %s', l)
+                report.summary = self.__parse_summary(l)
+                in_flowops = False
+            elif 'Per-Operation Breakdown' in l:
+                in_flowops = True
+            elif in_flowops:
+                m = self.flowop_pattern.match(l)
+                if m:
+                    report.flowops[m.group(1)] = {
+                        metric: float(v) for (metric, _), v in zip(self.flowop_metrics, m.groups()[1:])
+                        if v is not None}
+            elif 'ops/s' in l:
+                m = self.progress_pattern.match(l)
+                metrics = self.__parse_summary(l) if m else {}
+                if 'ops_throughput' in metrics:
+                    report.progress[0].append(float(m.group(1)))
+                    report.progress[1].append(metrics['ops_throughput'])
+
+        if not report.summary:
+            raise ValueError('IO Summary not found in the filebench output')
+
+        return report
+
+    def __parse_summary(self, line):
+        res = {}
+        for k, pattern in self.summary_patterns.items():
+            m = pattern.search(line)
+            if m:
+                res[k] = float(m.group(1))
+        return res
 
 
 class DaCapoResultParser(ExecutionResultParser):
+    """
+    DaCapo benchmark works executing a variable number of warmup iterations
+    until the completion time converge (a variance <= 3% in the latest 3
+    iterations).
+
+    The durations of all the iterations are parsed (see parse) and these
+    metrics are collected:
+    1) "timed_duration": the duration of the latest run
+    2) "warmup_iters": the number of iterations required to converge
+    3) "warmup_time": the total duration of the warmup iterations
+    4) "first_iter_duration" and "first_iter_penalty": the duration of the
+       first iteration and its ratio to the timed_duration
+    5) "steady_state_iter" and "time_to_steady_state": the first iteration
+       from which all the durations are within steady_state_tolerance from
+       the timed_duration and the time spent before it
+    6) "duration_cv": the coefficient of variation of the durations of the
+       last cv_window iterations
+    """
+
+    iteration_pattern = re.compile(r'(completed warmup [0-9]+|PASSED) in ([0-9]+) msec')
+
+    steady_state_tolerance = 0.03
+
+    cv_window = 3
 
     def get_metrics(self, tool, workload, logs):
-        """
-        DaCapo benchmark works executing a variable number of warmup iterations
-        until the completion time converge (a variance <= 3% in the latest 3
-        iterations).
 
-        Two metrics are collected:
-        1) "timed_duration": the duration of the latest run
-        2) "warmup_iters": the number of iterations required to converge
+        durations = self.parse(logs[0]['stderr'])
+        timed_duration = durations[-1]
+        warmups = durations[:-1]
 
-        :param stdout:
-        :param stderr:
-        :return:
-        """
+        res = {
+            'timed_duration': {'value': timed_duration, 'unit': 'ms'},
+            'warmup_iters': {'value': len(warmups), 'unit': 'num'},
+            'warmup_time': {'value': sum(warmups), 'unit': 'ms'},
+            'first_iter_duration': {'value': durations[0], 'unit': 'ms'},
+            'first_iter_penalty': {'value': durations[0] / timed_duration if timed_duration else None, 'unit': 'ratio'}
+        }
 
-        stderr = logs[0]['stderr']
-        lines = stderr.split('\n')
+        # the first iteration from which the durations are stable
+        steady = len(durations)
+        while steady > 1 and abs(durations[steady - 2] - timed_duration) <= self.steady_state_tolerance * timed_duration:
+            steady -= 1
+        res['steady_state_iter'] = {'value': steady, 'unit': 'num'}
+        res['time_to_steady_state'] = {'value': sum(durations[:steady - 1]), 'unit': 'ms'}
 
-        # timed duration is the only the one in the "PASSED" line
-        passed = [l for l in lines if 'PASSED' in l][0]
-        # time is the only number in the line
-        timed_duration = [n for n in passed.split() if n.isdigit()][0]
+        window = durations[-self.cv_window:]
+        mean = statistics.mean(window)
+        res['duration_cv'] = {'value': statistics.pstdev(window) / mean if mean else None, 'unit': 'ratio'}
 
-        # there is a line with "completed warmup" for each warmup executed
-        warmup_iters = len([l for l in lines if 'completed warmup' in l])
+        return res
 
-        return {
-            'timed_duration': {'value': int(timed_duration), 'unit': 'ms'},
-            'warmup_iters': {'value': int(warmup_iters), 'unit': 'num'}
-        }
+    def parse(self, stderr):
+        """
+        :return: the durations (in ms) of the warmup iterations and, as last
+        element, the one of the timed iteration
+        """
+        durations = array('l')
+        passed = False
+        for l in iter_lines(stderr):
+            # there is a line with "completed warmup" for each warmup executed
+            # and a "PASSED" line for the timed iteration
+            if 'msec' not in l:
+                continue
+            m = self.iteration_pattern.search(l)
+            if m:
+                durations.append(int(m.group(2)))
+                passed = m.group(1) == 'PASSED'
+
+        if not passed:
+            raise ValueError('PASSED line not found in the DaCapo output')
+
+        return durations
 
 class SysbenchResultParser(ExecutionResultParser):
-
-    start_pattern = re.compile("^###([a-zA-Z]+)###([0-9]+)###$")
-
-    cpu_metrics_patterns = {
-        'events_rate': (re.compile("^.*events per second:(.*)$"), 'num/s'),
-        'total_time':  (re.compile("^.*total time:(.*)s$"), 's'),
-        'latency_min': (re.compile("^.*min:(.*)$"), 'ms'),
-        'latency_max': (re.compile("^.*max:(.*)$"), 'ms'),
-        'latency_avg': (re.compile("^.*avg:(.*)$"), 'ms'),
-        'latency_95':  (re.compile("^.*95th percentile:(.*)$"), 'ms')
+    """
+    parses the output of the sysbench tests (cpu, memory, fileio, threads,
+    mutex and oltp). Each execution of sysbench is enclosed between a
+    "###<test>###<threads>###" and a "###END###" line and its metrics are
+    named "<metric>_<threads>".
+
+    The output is parsed line by line in a single pass: the metric lines
+    have the form "<key>: <numbers>" and they are dispatched on the key, so
+    that each line is looked up only once. Lines with a key not known (e.g.
+    the periodic reports) are skipped
+    """
+
+    start_pattern = re.compile("^###([a-zA-Z0-9_]+)###([0-9]+)###$")
+
+    end_line = '###END###'
+
+    number_pattern = re.compile('[-+]?[0-9]+(?:\\.[0-9]+)?(?:[eE][-+]?[0-9]+)?')
+
+    # key of the line -> metrics, one for each number in the value
+    metrics = {
+        # general statistics (all tests)
+        'events per second': [('events_rate', 'num/s')],
+        'total time': [('total_time', 's')],
+        'total number of events': [('events', 'num')],
+        'min': [('latency_min', 'ms')],
+        'avg': [('latency_avg', 'ms')],
+        'max': [('latency_max', 'ms')],
+        'sum': [('latency_sum', 'ms')],
+        'events (avg/stddev)': [('events_per_thread_avg', 'num'), ('events_per_thread_stddev', 'num')],
+        'execution time (avg/stddev)': [('exec_time_per_thread_avg', 's'), ('exec_time_per_thread_stddev', 's')],
+        # memory
+        'total operations': [('operations', 'num'), ('operations_rate', 'ops/s')],
+        'transferred': [('transferred', 'MiB'), ('transfer_rate', 'MiB/s')],
+        # fileio
+        'reads/s': [('reads_rate', 'ops/s')],
+        'writes/s': [('writes_rate', 'ops/s')],
+        'fsyncs/s': [('fsyncs_rate', 'ops/s')],
+        'read, mib/s': [('read_throughput', 'MiB/s')],
+        'written, mib/s': [('write_throughput', 'MiB/s')],
+        # oltp
+        'read': [('queries_read', 'num')],
+        'write': [('queries_write', 'num')],
+        'other': [('queries_other', 'num')],
+        'total': [('queries_total', 'num')],
+        'transactions': [('transactions', 'num'), ('transactions_rate', 'tx/s')],
+        'queries': [('queries', 'num'), ('queries_rate', 'queries/s')],
+        'ignored errors': [('errors', 'num'), ('errors_rate', 'num/s')],
+        'reconnects': [('reconnects', 'num'), ('reconnects_rate', 'num/s')]
     }
 
     def get_metrics(self, tool, workload, logs):
@@ -238,102 +644,233 @@ class SysbenchResultParser(ExecutionResultParser):
 
         """
         stdout = [e for e in logs if e['vm'] == 'default'][0]['stdout']
-        lines = stdout.split('\n')
-
-        # detect the different tool executions
-        execs_out = []
-        istart = iend = 0
-        while istart < len(lines):
-            match = self.start_pattern.match(lines[istart])
-            if match:
-                iend = istart
-                while iend < len(lines):
-                    if lines[iend] == '###END###':
-                        execs_out.append((match.group(1), int(match.group(2)), istart, iend))
-                        istart = iend
-                        break
-                    iend+=1
-            istart+=1
 
         res = {}
-        for exec in execs_out:
-            if exec[0] == 'cpu':
-                res.update(self.get_cpu_metrics(lines[exec[2]:exec[3]+1], exec[1]))
+        block = None
+        n_threads = None
+
+        for l in iter_lines(stdout):
+            if block is None:
+                match = self.start_pattern.match(l)
+                if match:
+                    block = []
+                    n_threads = int(match.group(2))
+            elif l == self.end_line:
+                # the metrics of executions not terminated are discarded
+                res.update(self.__get_block_metrics(block, n_threads))
+                block = None
+            else:
+                metric = self.parse_line(l)
+                if metric:
+                    block.extend(metric)
 
         return res
 
-
     def get_cpu_metrics(self, output, n_threads):
-        res = {}
+        return self.__get_block_metrics(
+            [m for l in output for m in self.parse_line(l) or []], n_threads)
+
+    def parse_line(self, line):
+        """
+        :return: a list of (name, value, unit) if the line contains metrics,
+        None otherwise
+        """
+        # the periodic reports (e.g. "[ 1s ] thds: 4 eps: 1234.56 ...")
+        if line.startswith('['):
+            return None
+
+        key, sep, value = line.partition(':')
+        if sep:
+            key = key.strip().lower()
+        elif ' transferred ' in line:
+            # e.g. "102400.00 MiB transferred (8535.54 MiB/sec)"
+            key, value = 'transferred', line
+        else:
+            return None
+
+        metrics = self.metrics.get(key)
+        if not metrics:
+            if not key.endswith('th percentile'):
+                return None
+            # e.g. "95th percentile:"
+            metrics = [('latency_' + key[:-len('th percentile')], 'ms')]
+
+        numbers = self.number_pattern.findall(value)
+        return [(name, float(n), unit) for (name, unit), n in zip(metrics, numbers)]
+
+    @staticmethod
+    def __get_block_metrics(metrics, n_threads):
+        return {'{0}_{1}'.format(name, n_threads): {'value': value, 'unit': unit}
+                for name, value, unit in metrics}
 
-        for l in output:
-            for k,v in self.cpu_metrics_patterns.items():
-                pattern, unit = v
-                m = pattern.match(l)
-                if(m):
-                    res['{0}_{1}'.format(k, n_threads)] = {'value':float(m.group(1).strip()), 'unit': unit}
 
+class IPerfReport:
+    """
+    the rows of the csv report of iperf (-y c) stored by column, so that the
+    statistics are computed on compact arrays. The udp columns are filled
+    only for the reports of the udp server (14 fields)
+    """
+
+    def __init__(self, rows, udp=False):
+        """
+        :param rows: the rows of the report, already split in fields
+        """
+        self.udp = udp
+        columns = list(zip(*rows)) or [()] * 14
+        intervals = [i.partition('-') for i in columns[6]]
+        self.stream = array('l', map(int, columns[5]))
+        self.start = array('d', [float(i[0]) for i in intervals])
+        self.end = array('d', [float(i[2]) for i in intervals])
+        self.transferred = array('q', map(int, columns[7]))
+        self.bandwidth = array('q', map(int, columns[8]))
+        if udp:
+            self.jitter = array('d', map(float, columns[9]))
+            self.lost = array('q', map(int, columns[10]))
+            self.total = array('q', map(int, columns[11]))
+            self.outoforder = array('q', map(int, columns[13]))
+
+    def __len__(self):
+        return len(self.stream)
+
+    def get_streams(self):
+        """
+        the ids of the streams, in order of appearance, without the sum of
+        the parallel streams (id -1)
+        """
+        res = []
+        for s in self.stream:
+            if s >= 0 and s not in res:
+                res.append(s)
         return res
 
+    def get_rows(self, stream):
+        return [i for i in range(len(self.stream)) if self.stream[i] == stream]
+
+    def split_rows(self, stream):
+        """
+        splits the rows of a stream in the ones of the periodic reports (-i)
+        and the one of the final report, the one that covers the whole test
+
+        :return: a tuple (interval rows, final row or None)
+        """
+        rows = self.get_rows(stream)
+        if not rows:
+            return [], None
+        end = max([self.end[i] for i in rows])
+        finals = [i for i in rows if self.start[i] == 0 and self.end[i] == end]
+        final = finals[-1] if finals else None
+        return [i for i in rows if i != final], final
 
 
 class IPerfResultParser(ExecutionResultParser):
+    """
+    parses the csv report of iperf (-y c). For each stream the metrics of
+    its final report are returned with the "_<n>" suffix (n is the position
+    of the stream) and, for parallel runs (-P), the total with "_sum".
+
+    If iperf runs with the periodic reports (-i), also the percentiles of
+    the bandwidth of the intervals are returned, for the total and for each
+    stream. The samples are available with parse_report()
+    """
+
+    percentiles = [50, 95, 99]
 
     def get_metrics(self, tool, workload, logs):
 
         stdout = [e for e in logs if e['vm'] == 'default'][0]['stdout']
 
+        tcp, udp = self.parse_report(stdout)
 
         if 'udp' in workload:
-            return self.__get_udp_metrics(stdout)
+            return self.__get_udp_metrics(tcp, udp)
         else:
-            return self.__get_tcp_metrics(stdout)
+            return self.__get_tcp_metrics(tcp)
+
+    @staticmethod
+    def parse_report(stdout):
+        """
+        parses the output in a single pass
+
+        :return: a tuple (IPerfReport of the client reports, IPerfReport of
+        the udp server reports)
+        """
+        rows = {9: [], 14: []}
+        for l in iter_lines(stdout):
+            fields = l.split(',')
+            if len(fields) in rows:
+                rows[len(fields)].append(fields)
+        return IPerfReport(rows[9]), IPerfReport(rows[14], udp=True)
 
-    def __get_tcp_metrics(self, stdout):
+    def __get_tcp_metrics(self, report):
 
         res = {}
-        lines = stdout.split("\n")
-        data = [l.split(',') for l in lines if len(l.split(',')) == 9]
+        streams = report.get_streams()
 
         c = 1
-        for i in range(0, len(data) -1) if len(data) > 1 else range(0,1):
-            res['transferred_'+str(c)] = {'value': int(data[i][7]), 'unit': 'bytes'}
-            res['bandwidth_'+str(c)] = {'value': int(data[i][8]), 'unit': 'bit/s'}
+        for s in streams:
+            intervals, final = report.split_rows(s)
+            if final is not None:
+                res['transferred_'+str(c)] = {'value': report.transferred[final], 'unit': 'bytes'}
+                res['bandwidth_'+str(c)] = {'value': report.bandwidth[final], 'unit': 'bit/s'}
+            if len(streams) > 1:
+                res.update(get_distribution_metrics(
+                    'bandwidth', [report.bandwidth[i] for i in intervals], 'bit/s', self.percentiles, str(c)))
             c+=1
 
-        if len(data) > 1:
-            res['transferred_sum'] =  {'value': int(data[c-1][7]), 'unit': 'bytes'}
-            res['bandwidth_sum'] =    {'value': int(data[c-1][8]), 'unit': 'bit/s'}
+        intervals, final = report.split_rows(-1)
+        if final is not None:
+            res['transferred_sum'] = {'value': report.transferred[final], 'unit': 'bytes'}
+            res['bandwidth_sum'] = {'value': report.bandwidth[final], 'unit': 'bit/s'}
+        elif len(streams) == 1:
+            intervals, final = report.split_rows(streams[0])
+
+        # the distribution of the total bandwidth of the intervals
+        res.update(get_distribution_metrics(
+            'bandwidth', [report.bandwidth[i] for i in intervals], 'bit/s', self.percentiles))
 
         return res
 
-    def __get_udp_metrics(self, stdout):
+    def __get_udp_metrics(self, client, report):
 
         res = {}
-        lines = stdout.split("\n")
-        data = [l.split(',') for l in lines if len(l.split(',')) == 14]
+        finals = [f for f in [report.split_rows(s)[1] for s in report.get_streams()] if f is not None]
 
         c = 1
-        for i in data:
-            res['transferred_'+str(c)] = {'value': int(i[7]), 'unit': 'bytes'}
-            res['bandwidth_'+str(c)] =    {'value': int(i[8]), 'unit': 'bit/s'}
-            res['total_datagrams_'+str(c)] = {'value': int(i[11]), 'unit': 'num'}
-            res['lost_datagrams'+str(c)] = {'value': int(i[10]), 'unit': 'num'}
-            res['jitter_'+str(c)] = {'value': i[9], 'unit': 'ms'}
-            res['outoforder_'+str(c)] = {'value': int(i[13]), 'unit': 'num'}
+        for i in finals:
+            res['transferred_'+str(c)] = {'value': report.transferred[i], 'unit': 'bytes'}
+            res['bandwidth_'+str(c)] =    {'value': report.bandwidth[i], 'unit': 'bit/s'}
+            res['total_datagrams_'+str(c)] = {'value': report.total[i], 'unit': 'num'}
+            res['lost_datagrams'+str(c)] = {'value': report.lost[i], 'unit': 'num'}
+            res['jitter_'+str(c)] = {'value': report.jitter[i], 'unit': 'ms'}
+            res['outoforder_'+str(c)] = {'value': report.outoforder[i], 'unit': 'num'}
             c+=1
 
-        tavg = sum([int(x[7]) for x in data]) / len(data)
-        bavg = sum([int(x[8]) for x in data]) / len(data)
-        davg = sum([int(x[11]) for x in data]) / len(data)
-        lavg = sum([int(x[10]) for x in data]) / len(data)
-        javg = sum([float(x[9]) for x in data]) / len(data)
-        oavg = sum([int(x[13]) for x in data]) / len(data)
-        res['transferred_avg'] = {'value': tavg, 'unit': 'bytes'}
-        res['bandwidth_avg'] =  {'value': bavg, 'unit': 'bit/s'}
-        res['total_datagrams_avg'] =  {'value': davg, 'unit': 'num'}
-        res['lost_datagrams_avg'] =  {'value': lavg, 'unit': 'num'}
-        res['jitter_avg'] =  {'value': javg, 'unit': 'ms'}
-        res['outoforder_avg'] =  {'value': oavg, 'unit': 'num'}
-
-        return res
\ No newline at end of file
+        if not finals:
+            return res
+
+        n = len(finals)
+        total = sum([report.total[i] for i in finals])
+        lost = sum([report.lost[i] for i in finals])
+        res['transferred_avg'] = {'value': sum([report.transferred[i] for i in finals]) / n, 'unit': 'bytes'}
+        res['bandwidth_avg'] =  {'value': sum([report.bandwidth[i] for i in finals]) / n, 'unit': 'bit/s'}
+        res['total_datagrams_avg'] =  {'value': total / n, 'unit': 'num'}
+        res['lost_datagrams_avg'] =  {'value': lost / n, 'unit': 'num'}
+        res['jitter_avg'] =  {'value': sum([report.jitter[i] for i in finals]) / n, 'unit': 'ms'}
+        res['outoforder_avg'] =  {'value': sum([report.outoforder[i] for i in finals]) / n, 'unit': 'num'}
+        res['loss_ratio'] = {'value': lost / total if total else 0.0, 'unit': 'ratio'}
+
+        # the jitter of the periodic server reports, if any, otherwise the
+        # one of the streams
+        intervals = [i for s in report.get_streams() for i in report.split_rows(s)[0]]
+        res.update(get_distribution_metrics(
+            'jitter', [report.jitter[i] for i in intervals or finals], 'ms', self.percentiles))
+
+        # the bandwidth of the intervals as seen by the client
+        streams = client.get_streams()
+        sum_intervals = client.split_rows(-1)[0]
+        if not sum_intervals and len(streams) == 1:
+            sum_intervals = client.split_rows(streams[0])[0]
+        res.update(get_distribution_metrics(
+            'bandwidth', [client.bandwidth[i] for i in sum_intervals], 'bit/s', self.percentiles))
+
+        return res
@@ -0,0 +1,195 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import logging
+import math
+import statistics
+
+logger = logging.getLogger(__name__)
+
+
+def t_critical(confidence, df):
+    """
+    :return: the two-sided critical value of the Student's t distribution
+    with df (integer) degrees of freedom, i.e. the t such that
+    P(|T| < t) = confidence. The distribution has a closed form for integer
+    degrees of freedom (Abramowitz and Stegun 26.7.3 and 26.7.4) that is
+    inverted by bisection
+    """
+    if not 0 < confidence < 1 or df < 1:
+        raise ValueError('Invalid confidence {0} or degrees of freedom {1}'.format(confidence, df))
+
+    def probability(theta):
+        # P(|T| < sqrt(df) * tan(theta))
+        c2 = math.cos(theta) ** 2
+        term, total = 1.0, 1.0
+        if df % 2:
+            if df == 1:
+                return 2 * theta / math.pi
+            for k in range(1, (df - 1) // 2):
+                term *= c2 * 2 * k / (2 * k + 1)
+                total += term
+            return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+
+        for k in range(1, df // 2):
+            term *= c2 * (2 * k - 1) / (2 * k)
+            total += term
+        return math.sin(theta) * total
+
+    low, high = 0.0, math.pi / 2
+    for _ in range(60):
+        theta = (low + high) / 2
+        if probability(theta) < confidence:
+            low = theta
+        else:
+            high = theta
+
+    return math.sqrt(df) * math.tan((low + high) / 2)
+
+
+def get_statistics(values, confidence=0.95):
+    """
+    :return: a dictionary with n, mean, median, stddev (of the sample) and
+    the confidence interval of the mean (ci_low, ci_high and ci_relative
+    width, i.e. the width of the interval divided by the mean). With less
+    than two values, the interval is not defined
+    """
+    n = len(values)
+    mean = statistics.mean(values)
+    res = {'n': n, 'mean': mean, 'median': statistics.median(values),
+           'stddev': 0.0, 'ci_low': None, 'ci_high': None, 'ci_relative_width': None}
+
+    if n < 2:
+        return res
+
+    stddev = statistics.stdev(values)
+    half_width = t_critical(confidence, n - 1) * stddev / math.sqrt(n)
+    res['stddev'] = stddev
+    res['ci_low'] = mean - half_width
+    res['ci_high'] = mean + half_width
+    if mean:
+        res['ci_relative_width'] = 2 * half_width / abs(mean)
+    elif not half_width:
+        res['ci_relative_width'] = 0.0
+    return res
+
+
+class RepeatedRun:
+    """
+    executes the execute script of a benchmark many times on the same
+    environment (install and cleanup are executed only once, outside of the
+    repetitions) and aggregates the metrics of the runs.
+
+    After each run, the logs are parsed with the parser of the benchmark. As
+    soon as min_runs runs have been executed, the repetitions stop when the
+    confidence interval of the mean of metric is narrower than
+    ci_relative_width (relative to the mean) or when max_runs runs have been
+    executed
+    """
+
+    def __init__(self, min_runs=3, max_runs=10, confidence=0.95, ci_relative_width=0.05, metric='duration'):
+        if min_runs < 1 or max_runs < min_runs:
+            raise ValueError('Invalid number of runs: min {0}, max {1}'.format(min_runs, max_runs))
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.confidence = confidence
+        self.ci_relative_width = ci_relative_width
+        self.metric = metric
+
+    @staticmethod
+    def from_props(props, **kwargs):
+        """
+        creates the object with the properties of the benchmark configuration
+        (min_runs, max_runs, confidence, ci_relative_width and ci_metric). The
+        keyword arguments override them
+        """
+        args = {}
+        for k, t in [('min_runs', int), ('max_runs', int), ('confidence', float),
+                     ('ci_relative_width', float), ('ci_metric', str)]:
+            if k in props:
+                args['metric' if k == 'ci_metric' else k] = t(props[k])
+        args.update(kwargs)
+        return RepeatedRun(**args)
+
+    def run(self, benchmark, execution, on_output=None):
+        """
+        :return: a dictionary with:
+        - runs: the metrics of each run
+        - metrics: the aggregated metrics. For each numeric metric of the
+          runs, <name>_mean, <name>_median, <name>_stddev, <name>_ci_low and
+          <name>_ci_high
+        - stopped_early: True if the runs stopped before max_runs
+        """
+        runs = []
+        stopped_early = False
+
+        while len(runs) < self.max_runs:
+            logger.info('Starting run {0} (max {1}) of {2}/{3}'.format(
+                len(runs) + 1, self.max_runs, benchmark.tool_id, benchmark.workload_id))
+
+            benchmark.execute(execution, on_output=on_output)
+            runs.append(self.__get_run_metrics(benchmark, execution))
+
+            if len(runs) >= self.min_runs and len(runs) < self.max_runs and self.__is_stable(runs):
+                stopped_early = True
+                break
+
+        return {'runs': runs,
+                'metrics': self.get_aggregated_metrics(runs),
+                'stopped_early': stopped_early}
+
+    @staticmethod
+    def __get_run_metrics(benchmark, execution):
+        metrics = {'duration': {'value': benchmark.get_runtime(execution, 'run'), 'unit': 's'}}
+        if benchmark.parser:
+            logs = benchmark.get_result(execution)
+            metrics.update(benchmark.parser.get_metrics(benchmark.tool_id, benchmark.workload_id, logs))
+        return metrics
+
+    def __is_stable(self, runs):
+        values = [r[self.metric]['value'] for r in runs if self.metric in r]
+        if len(values) < len(runs):
+            logger.warning('Metric {0} not available in all the runs. Early stopping disabled'.format(self.metric))
+            return False
+
+        s = get_statistics(values, self.confidence)
+        logger.info('{0}: mean {1:.4g}, confidence interval relative width {2}'.format(
+            self.metric, s['mean'],
+            '{0:.2%}'.format(s['ci_relative_width']) if s['ci_relative_width'] is not None else 'n/a'))
+
+        return s['ci_relative_width'] is not None and s['ci_relative_width'] <= self.ci_relative_width
+
+    def get_aggregated_metrics(self, runs):
+        res = {'repetitions': {'value': len(runs), 'unit': 'num'}}
+
+        names = []
+        for r in runs:
+            names.extend([n for n in r if n not in names])
+
+        for n in names:
+            values = [r[n]['value'] for r in runs if n in r]
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                continue
+            unit = [r[n]['unit'] for r in runs if n in r][0]
+            s = get_statistics(values, self.confidence)
+            for k in ['mean', 'median', 'stddev', 'ci_low', 'ci_high']:
+                if s[k] is not None:
+                    res['{0}_{1}'.format(n, k)] = {'value': s[k], 'unit': unit}
+
+        return res
@@ -0,0 +1,148 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import logging
+
+from benchsuite.stdlib.execution.sshexecutor import RemoteSSHExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class SweepScheduler:
+    """
+    executes many workloads in a session, sharing the installation among the
+    workloads of the same tool that have the same install scripts (see
+    BashCommandBenchmark.get_install_key), e.g. all the framework x test
+    combinations of web-frameworks.
+
+    For each group of workloads, the environment is provisioned and the
+    install scripts are executed only by the first execution. The other
+    executions reuse the installation through the install cache of the
+    RemoteSSHExecutor. After its run, each execution executes its own
+    cleanup script (e.g. to stop the server it started) and the other
+    executions remove their files. The uninstall script is executed once,
+    at the end of the group.
+
+    The results are returned as soon as each workload completes
+    """
+
+    def __init__(self, session, fail_on_error=False, on_result=None):
+        """
+        :param session: the BenchmarkingSession where the executions are
+        created (and where the environments are provisioned)
+        :param fail_on_error: if True, the first error stops the sweep
+        :param on_result: a function on_result(execution, result) called
+        with the ExecutionResult of each workload (e.g. to store it)
+        """
+        self.session = session
+        self.fail_on_error = fail_on_error
+        self.on_result = on_result
+
+    @staticmethod
+    def group(benchmarks):
+        """
+        :return: the benchmarks grouped by install key, in the order of their
+        first appearance
+        """
+        groups = {}
+        for b in benchmarks:
+            groups.setdefault(b.get_install_key(), []).append(b)
+        return list(groups.values())
+
+    def run(self, benchmarks):
+        """
+        :return: a generator of dictionaries with tool, workload, execution,
+        result (the ExecutionResult or None if the execution failed), phase
+        and error (the phase that failed and the exception, if any)
+        """
+        for group in self.group(benchmarks):
+            logger.info('Sweep of {0} workloads of {1} with a single install'.format(
+                len(group), group[0].tool_id))
+            yield from self.__run_group(group)
+
+    def __run_group(self, group):
+        executions = [self.session.new_execution(b) for b in group]
+        owner = executions[0]
+
+        executor = RemoteSSHExecutor(owner)
+        if not executor.get_option('use_install_cache') or executor.get_option('force_reinstall'):
+            logger.warning('The install cache is disabled for {0}: the install scripts '
+                           'will be executed for each workload'.format(owner.test.tool_id))
+
+        # provisions the environment and executes the install scripts
+        try:
+            owner.prepare()
+        except Exception as ex:
+            for e in executions:
+                yield self.__on_error(e, 'prepare', ex)
+            return
+
+        try:
+            for e in executions:
+                yield self.__run_execution(e, owner)
+        finally:
+            try:
+                owner.test.uninstall(owner)
+            except Exception as ex:
+                logger.error('Uninstall of {0} failed: {1}'.format(owner.test.tool_id, str(ex)))
+
+    def __run_execution(self, e, owner):
+        phase = 'prepare'
+        try:
+            if e is not owner:
+                # uses the vms of the owner and links its installation
+                e.prepare()
+
+            phase = 'run'
+            e.execute()
+
+            phase = 'parsing'
+            result = e.get_execution_result()
+
+        except Exception as ex:
+            return self.__on_error(e, phase, ex)
+
+        finally:
+            # also if the execution failed: its processes might be running
+            if phase != 'prepare':
+                try:
+                    e.test.cleanup_workload(e)
+                except Exception as ex:
+                    logger.error('Cleanup of {0}:{1} failed: {2}'.format(
+                        e.test.tool_id, e.test.workload_id, str(ex)))
+
+            if e is not owner:
+                try:
+                    e.test.remove_files(e)
+                except Exception as ex:
+                    logger.warning('Cannot remove the files of {0}: {1}'.format(e.id, str(ex)))
+
+        if self.on_result:
+            self.on_result(e, result)
+
+        return {'tool': e.test.tool_id, 'workload': e.test.workload_id, 'execution': e,
+                'result': result, 'phase': None, 'error': None}
+
+    def __on_error(self, e, phase, ex):
+        logger.error('Error in phase {0} of {1}:{2}: {3}'.format(
+            phase, e.test.tool_id, e.test.workload_id, str(ex)))
+        if self.fail_on_error:
+            raise ex
+        return {'tool': e.test.tool_id, 'workload': e.test.workload_id, 'execution': e,
+                'result': None, 'phase': phase, 'error': ex}
@@ -17,20 +17,82 @@
 # Developed in the ARTIST EU project (www.artist-project.eu) and in the
 # CloudPerfect EU project (https://cloudperfect.eu/)
 
+import collections
+import hashlib
+import json
 import logging
 import re
 import textwrap
 
-import sys
-
 from benchsuite.stdlib.execution.vm_environment import VMSetExecutionEnvironmentRequest
 from benchsuite.stdlib.execution.sshexecutor import RemoteSSHExecutor
+from benchsuite.stdlib.benchmark.parser_registry import get_parser
+from benchsuite.stdlib.benchmark.repetitions import RepeatedRun
+from benchsuite.stdlib.util.telemetry import get_logs_telemetry_metrics
 from benchsuite.core.model.benchmark import Benchmark
+from benchsuite.core.model.execution import ExecutionResultParser
 
 logger = logging.getLogger(__name__)
 
+class ScriptTemplate:
+    """
+    a script with $$name$$ placeholders, parsed once in a list of segments
+    that alternates literal text and placeholder names, so that it can be
+    rendered in a single pass. Placeholders not found in the interpolation
+    dictionary are left unchanged
+    """
+
+    placeholder = re.compile(r'\$\$([^$\n]+)\$\$')
+
+    def __init__(self, template):
+        self.segments = self.placeholder.split(textwrap.dedent(template))
+
+    def render(self, interpolation_dict):
+        res = list(self.segments)
+        for i in range(1, len(res), 2):
+            name = res[i]
+            res[i] = str(interpolation_dict[name]) if name in interpolation_dict else '$$' + name + '$$'
+        return ''.join(res)
+
+
+class TelemetryResultParser(ExecutionResultParser):
+    """
+    adds the summary of the telemetry sampled on the vms (if any) to the
+    metrics of the parser of the benchmark. It is false when there is
+    nothing to parse, i.e. if the benchmark has no parser and the last
+    results collected (see BashCommandBenchmark.get_result) do not contain
+    the telemetry
+    """
+
+    # set by BashCommandBenchmark.get_result
+    has_telemetry = False
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def get_metrics(self, tool, workload, logs):
+        metrics = dict(self.parser.get_metrics(tool, workload, logs)) if self.parser else {}
+        metrics.update(get_logs_telemetry_metrics(logs))
+        return metrics
+
+    def __bool__(self):
+        return self.parser is not None or self.has_telemetry
+
+
 class BashCommandBenchmark(Benchmark):
 
+    # the types of the scripts that can be defined for a benchmark. cleanup
+    # undoes what a single execution did (e.g. stops a server), while
+    # uninstall undoes the install and is executed only once, when the
+    # installation is not used anymore
+    script_types = ['install', 'postinstall', 'execute', 'cleanup', 'uninstall']
+
+    # compiled script templates and index (type, platform, vm) -> template.
+    # They are built by load_from_config_file (or at the first use, for
+    # benchmarks created before)
+    _templates = None
+    _script_index = None
+
     def __init__(self, tool_id, workload_id, tool_name, workload_name, workload_categories, workload_description):
         super().__init__(tool_id, workload_id, tool_name, workload_name,
                          workload_categories, workload_description)
@@ -43,22 +105,52 @@ class BashCommandBenchmark(Benchmark):
         executor = RemoteSSHExecutor(execution)
         executor.install()
 
-    def execute(self, execution, _async=False):
+    def execute(self, execution, _async=False, on_output=None):
         executor = RemoteSSHExecutor(execution)
-        executor.run(_async=_async)
+        executor.run(_async=_async, on_output=on_output)
+
+    def execute_repeated(self, execution, on_output=None, **kwargs):
+        '''
+        executes the execute script many times on the same environment and
+        aggregates the metrics of the runs (see RepeatedRun). The options are
+        read from the benchmark configuration (min_runs, max_runs,
+        confidence, ci_relative_width, ci_metric) and can be overridden with
+        the keyword arguments
+        '''
+        return RepeatedRun.from_props(self._props, **kwargs).run(self, execution, on_output=on_output)
 
     def cleanup(self, execution):
         executor = RemoteSSHExecutor(execution)
         executor.cleanup()
 
-    def get_result(self, execution):
+    def cleanup_workload(self, execution):
+        executor = RemoteSSHExecutor(execution)
+        executor.cleanup_workload()
+
+    def uninstall(self, execution):
         executor = RemoteSSHExecutor(execution)
-        return executor.collect_results()
+        executor.uninstall()
+
+    def remove_files(self, execution):
+        executor = RemoteSSHExecutor(execution)
+        executor.remove_files()
+
+    def get_result(self, execution, stream=False):
+        executor = RemoteSSHExecutor(execution)
+        logs = executor.collect_results(stream=stream)
+        # the results are parsed only if the parser is true
+        if isinstance(self.parser, TelemetryResultParser):
+            self.parser.has_telemetry = any('telemetry' in l for l in logs)
+        return logs
 
     def get_runtime(self, execution, phase):
         executor = RemoteSSHExecutor(execution)
         return executor.get_runtime(phase)
 
+    def get_timing_trace(self, execution):
+        executor = RemoteSSHExecutor(execution)
+        return executor.get_timing_trace()
+
     def get_install_script(self, vm_name, platform, interpolation_dict = {}):
         return self.__get_script('install', vm_name, platform, interpolation_dict)
 
@@ -71,7 +163,71 @@ class BashCommandBenchmark(Benchmark):
     def get_cleanup_script(self, vm_name, platform, interpolation_dict = {}):
         return self.__get_script('cleanup', vm_name, platform, interpolation_dict)
 
+    def get_uninstall_script(self, vm_name, platform, interpolation_dict = {}):
+        return self.__get_script('uninstall', vm_name, platform, interpolation_dict)
+
+    def get_install_key(self):
+        """
+        returns a key that is the same for the benchmarks of the same tool
+        that have the same vms and the same install, postinstall and
+        uninstall scripts (for all the platforms), so that they can share the
+        installation
+        """
+        scripts = sorted([(k, v) for k, v in self._props.items()
+                          if isinstance(v, str) and self._is_script_key(k, ['install', 'postinstall', 'uninstall'])])
+        content = json.dumps([self.tool_id, self._props.get('vm_list'), scripts])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _is_script_key(cls, key, types=None):
+        """
+        returns True if the key is a script of one of the types (by default,
+        all the script_types): "<type>" or "<type>_<platform and/or vm>". The
+        "<type>_order" keys are not scripts (see get_vm_stages)
+        """
+        type, _, suffix = key.partition('_')
+        return type in (types or cls.script_types) and suffix != 'order'
+
+    def get_vm_stages(self, type):
+        """
+        returns the vms of vm_list grouped in stages. The scripts of the vms in
+        the same stage are executed concurrently, while the stages are
+        executed one after the other.
+
+        The order is defined with the "<type>_order" property, a list of
+        stages separated by ";" (e.g. "execute_order = server; default"). The
+        vms not listed are executed in a last stage. If the property is not
+        defined, all the vms are in the same stage
+        """
+        vm_list = self._props['vm_list']
+
+        order = self._props.get(type + '_order')
+        if not order:
+            return [vm_list]
+
+        stages = [[v.strip() for v in s.split(',') if v.strip() in vm_list]
+                  for s in order.split(';')]
+
+        listed = [v for s in stages for v in s]
+        stages.append([v for v in vm_list if v not in listed])
+
+        return [s for s in stages if s]
+
     def __get_script(self, type, vm_name, platform, interpolation_dict):
+        if self._script_index is None:
+            self.__compile_scripts()
+
+        key = (type, platform, vm_name)
+        if key not in self._script_index:
+            self._script_index[key] = self.__resolve_script(type, vm_name, platform)
+
+        template = self._script_index[key]
+        if template is None:
+            return None
+
+        return template.render(interpolation_dict).strip()
+
+    def __resolve_script(self, type, vm_name, platform):
 
         # First try to search keys that have a combination of <type>_<platform_tokens>
         # The platform is tokenized at "_" characters
@@ -85,44 +241,40 @@ class BashCommandBenchmark(Benchmark):
         t = platform.split('_')
 
         for i in range(len(t), 0, -1):
-            prop = self._props.get(type + '_' + '_'.join(t[0:i]) + '_' + vm_name)
-            if not prop:
-                prop = self._props.get(type + '_' + '_'.join(t[0:i]))
-            if prop:
-                return textwrap.dedent(
-                    self.__replace_cp_properties(prop, interpolation_dict)).strip()
+            prefix = type + '_' + '_'.join(t[0:i])
+            for k in [prefix + '_' + vm_name, prefix]:
+                if self._props.get(k):
+                    return self.__get_template(k)
 
         # try without the platform (e.g. install)
         if type + '_' + vm_name in self._props:
-            return textwrap.dedent(self.__replace_cp_properties(
-                self._props[type + '_' + vm_name], interpolation_dict)).strip()
+            return self.__get_template(type + '_' + vm_name)
 
         if type in self._props:
-            return textwrap.dedent(self.__replace_cp_properties(
-                self._props[type], interpolation_dict)).strip()
+            return self.__get_template(type)
 
         return None
 
-
-    def __replace_cp_properties(self, string, interpolation_dict):
-
-        for occ in re.findall('\$\$.*\$\$', string):
-            if occ[2:-2] in interpolation_dict:
-                string = string.replace(occ, interpolation_dict[occ[2:-2]])
-
-        return string
-
+    def __get_template(self, key):
+        if key not in self._templates:
+            self._templates[key] = ScriptTemplate(self._props[key])
+        return self._templates[key]
+
+    def __compile_scripts(self):
+        """
+        compiles the templates of all the scripts defined for the benchmark
+        and resets the index (type, platform, vm) -> template, that is filled
+        the first time a script is requested for a platform and a vm
+        """
+        self._templates = {k: ScriptTemplate(v) for k, v in self._props.items()
+                           if isinstance(v, str) and self._is_script_key(k)}
+        self._script_index = {}
 
     @staticmethod
     def load_from_config_file(config, tool, workload):
 
         if 'parser' in config['DEFAULT']:
-            parser_class = config['DEFAULT']['parser']
-            module_name, class_name = parser_class.rsplit('.', 1)
-
-            __import__(module_name)
-            module = sys.modules[module_name]
-            parser = getattr(module, class_name)()
+            parser = get_parser(config['DEFAULT']['parser'])
         else:
             parser = None
 
@@ -144,16 +296,20 @@ class BashCommandBenchmark(Benchmark):
             description
         )
 
-        for k, v in config.items(workload):
-            instance._props[k] = v
+        # the DEFAULT section is not copied, but shared with the other
+        # workloads of the config, and the values are interpolated when they
+        # are read. The properties set later are stored only in the benchmark
+        instance._props = collections.ChainMap({}, config[workload])
 
-        instance.parser = parser
+        instance.parser = TelemetryResultParser(parser)
 
         if 'vm_list' in instance._props:
             instance._props['vm_list'] = [i.strip() for i in instance._props['vm_list'].split(',')]
         else:
             instance._props['vm_list'] = ['default']
 
+        instance.__compile_scripts()
+
         return instance
 
 
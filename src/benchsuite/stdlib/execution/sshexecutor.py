@@ -21,22 +21,96 @@ import os
 import logging
 import time
 import datetime
-
-from benchsuite.stdlib.util.ssh import run_ssh_cmd
+import hashlib
+import codecs
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from benchsuite.stdlib.util.ssh import run_ssh_cmd, run_ssh_cmd_single, \
+    ssh_stream_file, ssh_follow_files, SanitizedTextFile, sanitize_output, \
+    get_ssh_connection_pool
 from benchsuite.core.model.common import TestExecutor
 from benchsuite.core.model.exception import BashCommandExecutionFailedException
-from benchsuite.stdlib.util.timeutils import convert_to_h_m_s
+from benchsuite.stdlib.util.timeutils import convert_to_h_m_s, TimingTrace
+from benchsuite.stdlib.util.telemetry import get_sampler_commands, parse_telemetry
 
 logger = logging.getLogger(__name__)
 
 
 class RemoteSSHExecutor(TestExecutor):
 
+    # if True, the termination of a command is detected keeping open a channel
+    # that returns as soon as the lock file is removed. If the channel drops,
+    # the executor falls back to poll for the lock file
+    watch_for_termination = True
+
+    # max number of seconds a single watcher channel is kept open. After that
+    # a new one is opened, so that a broken connection is detected also during
+    # very long runs
+    watch_period = 300
+
+    # max number of vms on which the scripts of a phase run concurrently. If
+    # None, the scripts run on all the vms of a stage at the same time
+    max_parallel_vms = None
+
+    # the attributes below are the defaults of the options with the same name
+    # that can be set in the session properties or in the configuration of
+    # the benchmark (see get_option)
+
+    # if True, the install and post-install scripts are not executed again on
+    # a vm where the same scripts have already been executed (and the
+    # uninstall script has not been executed yet)
+    use_install_cache = True
+
+    # if True, the install cache is ignored and the scripts are always executed
+    force_reinstall = False
+
+    # max number of bytes of a log kept in memory when the results are
+    # collected as streams. Bigger logs are spooled to a temporary file
+    log_max_memory = 8 * 1024 * 1024
+
+    # the files of a phase that the remote wrapper packs in a single
+    # compressed archive at the end of the execution (see fetch_results)
+    bundle_content = ['cmd_stdout', 'cmd_stderr', 'cmd_retcode', 'cmd_time', 'cmd_timestamps']
+
+    # if True, the lines written by the run phase on stdout and stderr are
+    # logged while the command is still running (see follow_log)
+    live_log = False
+
+    # number of seconds between two reads of the output files by follow_log
+    live_log_period = 1
+
+    # if True, the usage of cpu (including the steal time), memory, disks and
+    # network is sampled from /proc on the vms while the phases in
+    # telemetry_phases are running. The time series is returned by
+    # collect_results (see benchsuite.stdlib.util.telemetry) and summarized
+    # in the telemetry_* metrics of the results (see TelemetryResultParser)
+    telemetry = False
+    telemetry_phases = ['run']
+
+    # number of seconds between two telemetry samples
+    telemetry_interval = 1
+
     def __init__(self, execution):
         self.id = execution.id
         self.test = execution.test
         self.env = execution.exec_env
         self.execution = execution
+        self.__props = None
+
+        # a new executor is created for each step, so the trace is kept in
+        # the execution
+        if not getattr(execution, 'timing_trace', None):
+            execution.timing_trace = TimingTrace()
+        self.trace = execution.timing_trace
+
+    def _get_working_dir(self, vm):
+        return vm.working_dir + os.path.sep + self.id
+
+    @staticmethod
+    def _get_install_cache_dir(vm):
+        return vm.working_dir + os.path.sep + '.benchsuite_install_cache'
 
     def _get_filename(self, phase, type):
         extensions = {
@@ -45,13 +119,61 @@ class RemoteSSHExecutor(TestExecutor):
             'cmd_script': 'sh',
             'cmd_wrapper_script': 'wrapper.sh',
             'cmd_lock': 'lock',
+            'cmd_pid': 'pid',
             'cmd_time': 'time',
-            'cmd_retcode': 'ret'
+            'cmd_timestamps': 'timestamps',
+            'cmd_retcode': 'ret',
+            'cmd_bundle': 'tar.gz',
+            'cmd_telemetry': 'telemetry.csv'
         }
         return '/tmp/{0}-{1}.{2}'.format(phase, self.id, extensions[type])
 
 
+    def get_timing_trace(self):
+        '''
+        :return: the TimingTrace with the duration of the steps executed on
+        the client (connect, launch, wait, fetch and collect) and the start
+        and the end of the phases recorded on the vms
+        '''
+        return self.trace
+
+    def get_option(self, name):
+        '''
+        :return: the value of an option of the executor, read from the
+        session properties, from the configuration of the benchmark or, if
+        not set in any of them, from the attribute of the class with the same
+        name. Values set as strings are converted to the type of the attribute
+        (lists are comma separated)
+        '''
+        default = getattr(self, name)
+        for props in [self.execution.session.props, getattr(self.test, '_props', {})]:
+            if name in props:
+                value = props[name]
+                break
+        else:
+            return default
+
+        if not isinstance(value, str):
+            return value
+        if isinstance(default, bool):
+            return value.strip().lower() == 'true'
+        if isinstance(default, (int, float)):
+            value = float(value)
+            return int(value) if value.is_integer() else value
+        if isinstance(default, list):
+            return [v.strip() for v in value.split(',') if v.strip()]
+        return value
+
+    def _get_bundle_content(self, phase):
+        if self.get_option('telemetry') and phase in self.get_option('telemetry_phases'):
+            return self.bundle_content + ['cmd_telemetry']
+        return self.bundle_content
+
     def __build_props_dict(self):
+        # the properties do not change during the life of the executor
+        if self.__props is not None:
+            return self.__props
+
         res = {}
 
         # add session properties
@@ -62,61 +184,323 @@ class RemoteSSHExecutor(TestExecutor):
             res.update({'{0}.{1}'.format(vm.benchsuite_name, k):v for k,v in vm.__dict__.items()})
             res.pop('{0}.priv_key'.format(vm.benchsuite_name))
 
+        self.__props = res
         return res
 
     def install(self):
+        props = self.__build_props_dict()
         for n in self.test._props['vm_list']:
             vm = self.env.vms[n]
-            cmd = self.test.get_install_script(vm.benchsuite_name, vm.platform, interpolation_dict=self.__build_props_dict())
-            if cmd:
-                self.__execute_cmd(vm, cmd, 'install')
-            else:
-                logger.warning('No install commands to execute for vm ' + vm.benchsuite_name)
+            cmds = [self.test.get_cleanup_script(vm.benchsuite_name, vm.platform, interpolation_dict=props),
+                    self.test.get_uninstall_script(vm.benchsuite_name, vm.platform, interpolation_dict=props)]
+            vm.reset_script = self.__generate_reset_script(vm, '\n'.join([c for c in cmds if c]))
+
+        # vms where the same install scripts have been already executed are
+        # skipped
+        hashes = {n: self.__get_install_hash(self.env.vms[n], props) for n in self.test._props['vm_list']}
+        to_install = [n for n in self.test._props['vm_list']
+                      if not self.__use_install_cache(self.env.vms[n], hashes[n])]
+
+        self.__execute_phase('install', 'install', self.test.get_install_script, vms=to_install)
+        self.__execute_phase('postinstall', 'post-install', self.test.get_postinstall_script, vms=to_install)
+
+        if self.get_option('use_install_cache'):
+            for n in to_install:
+                vm = self.env.vms[n]
+                marker = self._get_install_cache_dir(vm) + os.path.sep + hashes[n]
+                run_ssh_cmd(vm, 'mkdir -p {0} && echo {1} > {2}'.format(
+                    self._get_install_cache_dir(vm), self._get_working_dir(vm), marker))
+
+    def __get_install_hash(self, vm, props):
+        install = self.test.get_install_script(vm.benchsuite_name, vm.platform, interpolation_dict=props)
+        postinstall = self.test.get_postinstall_script(vm.benchsuite_name, vm.platform, interpolation_dict=props)
+        content = '\n'.join([vm.platform, install or '', postinstall or ''])
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def __use_install_cache(self, vm, install_hash):
+        '''
+        checks if the install scripts with the given hash have already been
+        executed on the vm. If so, the working directory of this execution is
+        linked to the one where the scripts have been executed, so that the
+        files installed there are available
+        '''
+        if not self.get_option('use_install_cache'):
+            return False
 
-        for n in self.test._props['vm_list']:
-            vm = self.env.vms[n]
-            cmd = self.test.get_postinstall_script(vm.benchsuite_name, vm.platform, interpolation_dict=self.__build_props_dict())
-            if cmd:
-                self.__execute_cmd(vm, cmd, 'post-install')
-            else:
-                logger.warning('No Post-install commands to execute for vm ' + vm.benchsuite_name)
+        if self.get_option('force_reinstall'):
+            logger.info('Install cache ignored for vm {0} (force reinstall)'.format(vm.benchsuite_name))
+            return False
 
-    def run(self, _async=False):
-        for n in self.test._props['vm_list']:
-            vm = self.env.vms[n]
-            cmd = self.test.get_execute_script(vm.benchsuite_name, vm.platform, interpolation_dict=self.__build_props_dict())
-            if cmd:
-                self.__execute_cmd(vm, cmd, 'run', _async=_async)
-            else:
-                logger.warning('No execute commands found for this platform ({0})'.format(vm.platform))
-                #raise NoExecuteCommandsFound(logger.error('No execute commands found for platform {0}'.format(vm.platform)))
+        marker = self._get_install_cache_dir(vm) + os.path.sep + install_hash
+        working_dir = self._get_working_dir(vm)
+
+        exit_status, _, _ = run_ssh_cmd(vm, '''test -f {0} && test -d "$(cat {0})" || exit 1
+test -e {1} || ln -s "$(cat {0})" {1}'''.format(marker, working_dir))
+
+        if exit_status == 0:
+            logger.info('Install cache hit for vm {0} (hash {1}). Skipping install'.format(
+                vm.benchsuite_name, install_hash[:12]))
+            return True
+
+        logger.info('Install cache miss for vm {0} (hash {1})'.format(
+            vm.benchsuite_name, install_hash[:12]))
+        return False
 
-    def collect_results(self):
+    def run(self, _async=False, on_output=None):
+        '''
+        :param on_output: a function on_output(vm_name, stream, line) that is
+        called for each line written on stdout ('stdout') or stderr ('stderr')
+        by the benchmark while it is running. It is called concurrently by the
+        threads that run the script on different vms. An exception raised by
+        the function makes the execution fail and kills the command on the vm
+        '''
+        self.__execute_phase('execute', 'run', self.test.get_execute_script,
+                             _async=_async, on_output=on_output)
+
+    def collect_results(self, stream=False):
+        '''
+        :param stream: if True, stdout and stderr are returned as file-like
+        objects that can be iterated line by line (see open_log) instead of
+        strings
+        :return: a list of dictionaries with vm, stdout, stderr and, if
+        telemetry is enabled, the time series sampled on the vm (see
+        parse_telemetry)
+        '''
         res = []
         for n in self.test._props['vm_list']:
             vm = self.env.vms[n]
-            out = self.__get_cmd_output(vm, 'cat ' + self._get_filename('run', 'cmd_stdout'))
-            err = self.__get_cmd_output(vm, 'cat ' + self._get_filename('run', 'cmd_stderr'))
-            res.append({'vm': vm.benchsuite_name, 'stdout': out, 'stderr': err})
+            with self.trace.step('collect', phase='run', vm=vm.benchsuite_name):
+                files = self.fetch_results(vm, 'run')
+            out = SanitizedTextFile(files['cmd_stdout'])
+            err = SanitizedTextFile(files['cmd_stderr'])
+            if not stream:
+                out, err = out.read(), err.read()
+            log = {'vm': vm.benchsuite_name, 'stdout': out, 'stderr': err}
+            if 'cmd_telemetry' in files:
+                log['telemetry'] = parse_telemetry(files['cmd_telemetry'].read().decode('utf-8'))
+            res.append(log)
+
+        return res
+
+    def fetch_results(self, vm, phase):
+        '''
+        transfers all the files of a phase (see _get_bundle_content) from the vm
+        with a single round trip, downloading the compressed archive created by
+        the remote wrapper. If the archive is not available (e.g. tar is not
+        installed on the vm), the files are transferred one by one
+
+        :return: a dictionary type -> binary file-like object (at most
+        log_max_memory bytes of each file are kept in memory)
+        '''
+        bundle = self._get_filename(phase, 'cmd_bundle')
+        try:
+            return self.__unpack_bundle(phase, self.__download(vm, bundle, compress=False))
+        except (IOError, tarfile.TarError) as ex:
+            logger.debug('Cannot transfer the results bundle {0} ({1}). '
+                         'Transferring the files one by one'.format(bundle, str(ex)))
 
+        res = {}
+        for t in self._get_bundle_content(phase):
+            try:
+                res[t] = self.__download(vm, self._get_filename(phase, t))
+            except IOError:
+                # the telemetry is not available if the sampler failed
+                if t != 'cmd_telemetry':
+                    raise
+                logger.warning('Telemetry of phase {0} not available on vm {1}'.format(phase, vm.benchsuite_name))
         return res
 
+    def __unpack_bundle(self, phase, archive):
+        types = {os.path.basename(self._get_filename(phase, t)): t for t in self._get_bundle_content(phase)}
+        res = {}
+        with tarfile.open(fileobj=archive, mode='r:gz') as tar:
+            for member in tar:
+                if member.name not in types:
+                    continue
+                spool = tempfile.SpooledTemporaryFile(max_size=self.log_max_memory)
+                src = tar.extractfile(member)
+                for chunk in iter(lambda: src.read(65536), b''):
+                    spool.write(chunk)
+                spool.seek(0)
+                res[types[member.name]] = spool
+        archive.close()
+
+        missing = [t for t in self._get_bundle_content(phase) if t not in res]
+        if missing:
+            raise tarfile.TarError('files {0} missing in the bundle'.format(', '.join(missing)))
+
+        return res
+
+    def open_log(self, vm, phase, type):
+        '''
+        transfers a remote file (compressed, if possible) and returns a
+        file-like object with its content. At most log_max_memory bytes are
+        kept in memory, the rest is spooled to a local temporary file
+        '''
+        return SanitizedTextFile(self.__download(vm, self._get_filename(phase, type)))
+
+    def __download(self, vm, path, compress=True):
+        spool = tempfile.SpooledTemporaryFile(max_size=self.log_max_memory)
+
+        if compress:
+            try:
+                for chunk in ssh_stream_file(vm, path, compress=True):
+                    spool.write(chunk)
+                spool.seek(0)
+                return spool
+            except IOError as ex:
+                logger.debug('Cannot transfer {0} compressed ({1}). Retrying without compression'.format(path, str(ex)))
+                spool.seek(0)
+                spool.truncate()
+
+        for chunk in ssh_stream_file(vm, path, compress=False):
+            spool.write(chunk)
+
+        spool.seek(0)
+        return spool
+
     def get_runtime(self, phase, vm = None):
         if not vm:
             if 'default' in self.env.vms:
                 vm = self.env.vms['default']
             else:
                 vm = self.env.vms[self.test._props['vm_list'][-1]]
-        return int(self.__get_cmd_output(vm, 'cat ' + self._get_filename(phase, 'cmd_time')))
+
+        # the runtime recorded when the phase has been executed by this
+        # client, if available, saves a round trip
+        times = self.trace.get_phase_time(phase, vm.benchsuite_name)
+        if times:
+            return times[1] - times[0]
+
+        return float(self.__get_cmd_output(vm, 'cat ' + self._get_filename(phase, 'cmd_time')))
 
     def cleanup(self):
+        '''
+        executes the cleanup script. The installation is kept, so that the
+        next executions with the same install scripts can use it (see
+        uninstall)
+        '''
+        self.cleanup_workload()
+
+    def cleanup_workload(self):
+        '''
+        executes only the cleanup script, that undoes what the execute script
+        did (e.g. stops a server or removes the files of the workload), so
+        that the installation can be used by other executions
+        '''
+        self.__execute_phase('cleanup', 'cleanup', self.test.get_cleanup_script)
+
+        # the warm pool has to undo only the install
+        for n, cmd in self.__get_scripts(self.test.get_uninstall_script).items():
+            vm = self.env.vms[n]
+            vm.reset_script = self.__generate_reset_script(vm, cmd)
+
+    def uninstall(self):
+        '''
+        executes the uninstall script, that undoes the install scripts, and
+        invalidates the install cache of the vms where it has been executed.
+        If the benchmark does not define the script for any vm, nothing is
+        done and the installation stays in the cache
+        '''
+        uninstalled = [n for n, cmd in self.__get_scripts(self.test.get_uninstall_script).items() if cmd]
+        if not uninstalled:
+            return
+
+        props = self.__build_props_dict()
+
+        self.__execute_phase('uninstall', 'uninstall', self.test.get_uninstall_script, vms=uninstalled)
+
+        for n in uninstalled:
+            vm = self.env.vms[n]
+            vm.reset_script = self.__generate_reset_script(vm, None)
+
+            if self.get_option('use_install_cache'):
+                marker = self._get_install_cache_dir(vm) + os.path.sep + self.__get_install_hash(vm, props)
+                run_ssh_cmd(vm, 'rm -f ' + marker)
+
+    def __get_scripts(self, get_script):
+        '''
+        :return: a dictionary vm name -> script (None if the benchmark does not
+        define it for the vm)
+        '''
+        props = self.__build_props_dict()
+        return {n: get_script(self.env.vms[n].benchsuite_name, self.env.vms[n].platform, interpolation_dict=props)
+                for n in self.test._props['vm_list']}
+
+    def remove_files(self):
+        '''
+        removes the files of this execution from the vms (the files of the
+        phases and the working directory, if it is a link to the one where
+        the install scripts have been executed) without executing the cleanup
+        script, so that the installation can be used by other executions
+        '''
         for n in self.test._props['vm_list']:
             vm = self.env.vms[n]
-            cmd = self.test.get_cleanup_script(vm.benchsuite_name, vm.platform, interpolation_dict=self.__build_props_dict())
-            if cmd:
-                self.__execute_cmd(vm, cmd, 'cleanup')
-            else:
-                logger.warning('No cleanup commands to execute')
+            working_dir = self._get_working_dir(vm)
+            run_ssh_cmd(vm, 'rm -f /tmp/*-{0}.*; test ! -L {1} || rm -f {1}'.format(self.id, working_dir))
+
+    def __execute_phase(self, type, phase, get_script, _async=False, vms=None, on_output=None):
+        '''
+        executes the script of the phase on all the vms. The vms are grouped
+        in stages by the benchmark (see BashCommandBenchmark.get_vm_stages):
+        the scripts of the vms in the same stage run concurrently, while the
+        stages run one after the other. If the execution fails on one or more
+        vms, the next stages are not executed and a single exception is raised
+
+        :param type: the type of the script (install, execute, ...)
+        :param phase: the name of the phase used for the remote files
+        :param get_script: the function of the benchmark that returns the script
+        :param vms: if set, the phase is executed only on these vms
+        :param on_output: see run()
+        '''
+        props = self.__build_props_dict()
+
+        for stage in self.test.get_vm_stages(type):
+            cmds = {}
+            for n in [n for n in stage if vms is None or n in vms]:
+                vm = self.env.vms[n]
+                cmd = get_script(vm.benchsuite_name, vm.platform, interpolation_dict=props)
+                if cmd:
+                    cmds[n] = cmd
+                else:
+                    logger.warning('No {0} commands to execute for vm {1} (platform: {2})'.format(
+                        phase, vm.benchsuite_name, vm.platform))
+
+            if not cmds:
+                continue
+
+            workers = min(len(cmds), self.max_parallel_vms or len(cmds))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {n: pool.submit(self.__execute_cmd, self.env.vms[n], c, phase,
+                                          _async=_async, on_output=on_output)
+                           for n, c in cmds.items()}
+
+            errors = {}
+            for n, f in futures.items():
+                if f.exception():
+                    errors[n] = f.exception()
+
+            if errors:
+                raise self.__aggregate_errors(phase, cmds, errors)
+
+    @staticmethod
+    def __aggregate_errors(phase, cmds, errors):
+        if len(errors) == 1:
+            return list(errors.values())[0]
+
+        def get_attr(ex, attr):
+            return getattr(ex, attr, None) or ''
+
+        e = BashCommandExecutionFailedException(
+            'phase {0} failed on {1} vms: {2}'.format(phase, len(errors), ', '.join(
+                ['{0} ({1})'.format(n, str(ex)) for n, ex in errors.items()])))
+        e.cmd = '\n'.join(['### {0}\n{1}'.format(n, cmds[n]) for n in errors])
+        e.exit_statuses = {n: getattr(ex, 'exit_status', None) for n, ex in errors.items()}
+        e.exit_status = list(e.exit_statuses.values())[0]
+        e.stdout = '\n'.join(['### {0}\n{1}'.format(n, get_attr(ex, 'stdout')) for n, ex in errors.items()])
+        e.stderr = '\n'.join(['### {0}\n{1}'.format(n, get_attr(ex, 'stderr')) for n, ex in errors.items()])
+        e.errors = errors
+        return e
 
     @staticmethod
     def __get_cmd_output(vm, cmd):
@@ -126,7 +510,7 @@ class RemoteSSHExecutor(TestExecutor):
 
     # TODO: at the moment there is no way of controlling poll_for_termination
     # value from the command line or settings/env variables
-    def __execute_cmd(self, vm, cmd, phase, _async=False, poll_for_termination=True):
+    def __execute_cmd(self, vm, cmd, phase, _async=False, poll_for_termination=True, on_output=None):
         '''
 
         :param vm:
@@ -136,36 +520,64 @@ class RemoteSSHExecutor(TestExecutor):
         :param poll_for_termination: if False, wait until the command is finished
         keeping the ssh connection up (that might lead to problems). If True,
         checks periodically if the lock file still exists
+        :param on_output: see run()
         :return: the exit code or 0 if async == True
         '''
 
         logger.info('Executing "{0}" commands on vm "{1}"'.format(phase, vm.benchsuite_name))
 
-        remote_script = self.__generate_remote_script(vm, cmd, phase)
+        # the times of a previous execution of the phase (e.g. a repeated run)
+        # must not be returned if the timestamps of this one are not available
+        self.trace.clear_phase_time(phase, vm.benchsuite_name)
+
+        remote_script = self.__generate_remote_script(
+            vm, cmd, phase, background=poll_for_termination or _async)
 
-        # if poll_for_termination, we just launch the command and then check
-        # when it is finished by ourself
-        exit_status, stdout, stderr = \
-            run_ssh_cmd(vm, remote_script, _async=poll_for_termination or _async)
+        with self.trace.step('connect', phase=phase, vm=vm.benchsuite_name):
+            try:
+                get_ssh_connection_pool().get_client(vm)
+            except Exception as ex:
+                # run_ssh_cmd retries
+                logger.debug('Cannot connect to {0}: {1}'.format(vm.benchsuite_name, str(ex)))
+
+        # if poll_for_termination, we just launch the command in background
+        # and then check when it is finished by ourself. The script is
+        # uploaded by the same command that launches it
+        with self.trace.step('launch', phase=phase, vm=vm.benchsuite_name):
+            exit_status, stdout, stderr = run_ssh_cmd(vm, remote_script)
 
         if _async:
             logger.info('Execution launched. Since async=True return immediately')
             return 0
 
         if poll_for_termination:
-            waited_time = self._wait_for_cmd(vm, phase)
-
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug('Waited vs. Actual runtime: {0} vs. {1} seconds'.format(
-                    int(waited_time.total_seconds()), self.get_runtime(phase, vm=vm)))
-
-        exit_status = int(self.__get_cmd_output(vm, 'cat ' + self._get_filename(phase, 'cmd_retcode')))
+            if not on_output and phase == 'run' and self.get_option('live_log'):
+                on_output = self.__log_output
+            with self.trace.step('wait', phase=phase, vm=vm.benchsuite_name):
+                if on_output:
+                    waited_time = self.__follow_cmd(vm, phase, on_output)
+                else:
+                    waited_time = self._wait_for_cmd(vm, phase)
+
+        # only the small status files are transferred here. The output is
+        # transferred by collect_results or, if the command failed, below
+        with self.trace.step('fetch', phase=phase, vm=vm.benchsuite_name):
+            exit_status, runtime, timestamps = self.__fetch_status(vm, phase)
+
+        if len(timestamps) == 2:
+            self.trace.set_phase_time(phase, vm.benchsuite_name,
+                                      int(timestamps[0]) / 1e9, int(timestamps[1]) / 1e9)
+
+        if poll_for_termination and logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Waited vs. Actual runtime: {0:.3f} vs. {1} seconds'.format(
+                waited_time.total_seconds(), runtime))
 
         logger.info('Execution exited with status code {0}'.format(exit_status))
 
         if not exit_status == 0:
-            cmd_out = self.__get_cmd_output(vm, 'cat ' + self._get_filename(phase, 'cmd_stdout'))
-            cmd_err = self.__get_cmd_output(vm, 'cat ' + self._get_filename(phase, 'cmd_stderr'))
+            files = self.fetch_results(vm, phase)
+            cmd_out = SanitizedTextFile(files['cmd_stdout']).read()
+            cmd_err = SanitizedTextFile(files['cmd_stderr']).read()
 
             e = BashCommandExecutionFailedException(
                 'command {0} exit with status {1}. The output is: "{2}"'.format(cmd, exit_status, stdout))
@@ -177,11 +589,115 @@ class RemoteSSHExecutor(TestExecutor):
 
         return exit_status
 
+    def __fetch_status(self, vm, phase):
+        '''
+        reads the exit status, the runtime and the timestamps of a phase with
+        a single command (one line for each file)
+
+        :return: a tuple (exit status, runtime, list of timestamps)
+        '''
+        files = [self._get_filename(phase, t) for t in ['cmd_retcode', 'cmd_time', 'cmd_timestamps']]
+        _, out, _ = run_ssh_cmd(vm, 'for f in {0}; do echo $(cat $f 2> /dev/null); done'.format(' '.join(files)))
+
+        lines = out.splitlines()
+        if len(lines) != 3 or not lines[0].strip():
+            raise IOError('Exit status of phase {0} not available on vm {1}'.format(phase, vm.benchsuite_name))
+
+        return int(lines[0]), lines[1].strip(), lines[2].split()
+
+    def follow_log(self, vm, phase, retry_times=3):
+        '''
+        yields the lines written on stdout and stderr by the command of the
+        phase while it is running, as tuples ('stdout'|'stderr', line). It
+        returns when the command is finished and all the lines have been
+        yielded.
+
+        The new bytes of the output files are read incrementally over a single
+        channel (see ssh_follow_files). If the channel drops, a new one is
+        opened that restarts from the last byte received
+        '''
+        streams = ['stdout', 'stderr']
+        offsets = [0, 0]
+        decoders = [codecs.getincrementaldecoder('utf-8')(errors='replace') for _ in streams]
+        buffers = ['', '']
+
+        retry = 0
+        while True:
+            try:
+                for i, data in ssh_follow_files(
+                        vm, self._get_filename(phase, 'cmd_stdout'),
+                        self._get_filename(phase, 'cmd_stderr'),
+                        self._get_filename(phase, 'cmd_lock'),
+                        offsets=offsets, period=self.get_option('live_log_period')):
+                    offsets[i] += len(data)
+                    lines = (buffers[i] + decoders[i].decode(data)).split('\n')
+                    buffers[i] = lines.pop()
+                    for line in lines:
+                        yield streams[i], sanitize_output(line)
+                break
+            except IOError as ex:
+                retry += 1
+                if retry > retry_times:
+                    raise
+                logger.warning('Error following the output on vm {0} ({1}). Retrying'.format(
+                    vm.benchsuite_name, str(ex)))
+
+        for i in range(len(streams)):
+            last = buffers[i] + decoders[i].decode(b'', final=True)
+            if last:
+                yield streams[i], sanitize_output(last)
+
+    def __follow_cmd(self, vm, phase, on_output):
+        t_start = datetime.datetime.now()
+
+        lines = self.follow_log(vm, phase)
+        while True:
+            try:
+                stream, line = next(lines)
+            except StopIteration:
+                return datetime.datetime.now() - t_start
+            except Exception as ex:
+                logger.warning('Cannot follow the output of the command '
+                               '({0}). Waiting for its termination'.format(str(ex)))
+                self._wait_for_cmd(vm, phase)
+                return datetime.datetime.now() - t_start
+
+            try:
+                on_output(vm.benchsuite_name, stream, line)
+            except Exception:
+                # the command would keep running (and holding the lock) on
+                # the vm, so it is killed before raising the exception
+                lines.close()
+                try:
+                    self.__kill_cmd(vm, phase)
+                except Exception as ex:
+                    logger.error('Cannot kill the command of phase {0} on vm {1}: {2}'.format(
+                        phase, vm.benchsuite_name, str(ex)))
+                raise
+
+    def __kill_cmd(self, vm, phase):
+        '''
+        kills the process group of the remote wrapper of the phase (i.e. the
+        command and the telemetry sampler) and removes the lock file
+        '''
+        logger.warning('Killing the command of phase {0} on vm {1}'.format(phase, vm.benchsuite_name))
+        run_ssh_cmd(vm, 'p=$(cat {0} 2> /dev/null) && {{ kill -TERM -- -$p 2> /dev/null || kill -TERM $p; }}; rm -f {1}'.format(
+            self._get_filename(phase, 'cmd_pid'), self._get_filename(phase, 'cmd_lock')))
+
+    @staticmethod
+    def __log_output(vm_name, stream, line):
+        logger.info('[{0}:{1}] {2}'.format(vm_name, stream, line))
+
     def _wait_for_cmd(self, vm, phase):
         t_start = datetime.datetime.now()
 
-        # wait for 5 seconds to be sure that the lock file has been created
-        time.sleep(5)
+        if self.watch_for_termination:
+            try:
+                self.__watch_lock(vm, phase, t_start)
+                return datetime.datetime.now() - t_start
+            except Exception as ex:
+                logger.warning('Cannot watch for the termination of the command '
+                               '({0}). Falling back to polling'.format(str(ex)))
 
         lock_exists, _, _ = \
             run_ssh_cmd(vm, 'test ! -f ' + self._get_filename(phase, 'cmd_lock'))
@@ -200,6 +716,41 @@ class RemoteSSHExecutor(TestExecutor):
 
         return datetime.datetime.now() - t_start
 
+    def __watch_lock(self, vm, phase, t_start):
+        '''
+        blocks until the lock file is removed. The remote watcher uses
+        inotifywait if available, otherwise it checks the lock file on the vm
+        every 0.5 seconds. Each watcher exits with status 3 after watch_period
+        seconds and a new one is started. Any other failure (e.g. the
+        connection drops) raises an exception
+        '''
+        lock = self._get_filename(phase, 'cmd_lock')
+
+        watcher = '''end=$((SECONDS+{1}))
+while test -f {0}; do
+  test $SECONDS -ge $end && exit 3
+  inotifywait -qq -t 5 -e delete_self {0} 2> /dev/null || sleep 0.5
+done
+exit 0'''.format(lock, self.watch_period)
+
+        while True:
+            # if no data is received within the timeout, the connection is
+            # considered broken
+            exit_status, _, err = run_ssh_cmd_single(
+                vm, watcher, timeout=self.watch_period + 60)
+
+            if exit_status == 0:
+                return
+
+            if exit_status != 3:
+                raise Exception('watcher exited with status {0}: {1}'.format(
+                    exit_status, err))
+
+            if logger.isEnabledFor(logging.INFO):
+                running_time = datetime.datetime.now() - t_start
+                logger.info('Running since {0}. Lock file still exists'.format(
+                    convert_to_h_m_s(running_time.total_seconds())))
+
     @staticmethod
     def __get_sleeptime(step):
         if step < 6:
@@ -211,7 +762,35 @@ class RemoteSSHExecutor(TestExecutor):
 
         return 300
 
-    def __generate_remote_script(self, vm, cmd, phase):
+    def __generate_reset_script(self, vm, cleanup_cmd):
+        '''
+        generates the script that a warm pool executes to clean the vm before
+        reusing it (see WarmVMPool). It runs the cleanup script of the
+        benchmark (if any) and removes the files of all the executions that
+        ran on the vm
+        '''
+        working_dir = self._get_working_dir(vm)
+
+        # only the last script generated for the vm is executed
+        ids = getattr(vm, 'execution_ids', [])
+        if self.id not in ids:
+            vm.execution_ids = ids + [self.id]
+
+        script = ''
+        if cleanup_cmd:
+            script += '''mkdir -p {0} && cd {0} && bash -e << 'RESET' || exit 1
+{1}
+RESET
+'''.format(working_dir, cleanup_cmd)
+
+        files = [self._get_install_cache_dir(vm)]
+        for i in vm.execution_ids:
+            files.extend([vm.working_dir + os.path.sep + i, '/tmp/*-{0}.*'.format(i)])
+        script += 'cd / && rm -rf ' + ' '.join(files)
+
+        return script
+
+    def __generate_remote_script(self, vm, cmd, phase, background=False):
 
         script = self._get_filename(phase, 'cmd_script')
         script_wrapper = self._get_filename(phase, 'cmd_wrapper_script')
@@ -220,13 +799,38 @@ class RemoteSSHExecutor(TestExecutor):
         out = self._get_filename(phase, 'cmd_stdout')
         err = self._get_filename(phase, 'cmd_stderr')
         runtime = self._get_filename(phase, 'cmd_time')
+        timestamps = self._get_filename(phase, 'cmd_timestamps')
+        bundle = self._get_filename(phase, 'cmd_bundle')
+        bundle_content = self._get_bundle_content(phase)
+        bundle_files = ' '.join([os.path.basename(self._get_filename(phase, t))
+                                 for t in bundle_content])
+
+        # the sampler runs in background while the command is running and
+        # takes a last sample when it ends
+        start_telemetry, stop_telemetry = '', ''
+        if 'cmd_telemetry' in bundle_content:
+            start_telemetry, stop_telemetry = get_sampler_commands(
+                self._get_filename(phase, 'cmd_telemetry'), self.get_option('telemetry_interval'))
 
-        working_dir = vm.working_dir + os.path.sep + self.id
+        working_dir = self._get_working_dir(vm)
 
         # removes empty lines
         cmd = os.linesep.join([s for s in cmd.splitlines() if s])
 
+        # the start and the end of the command are recorded with nanosecond
+        # resolution. If date does not support %N (e.g. busybox), the runtime
+        # falls back to $SECONDS and the timestamps file is left empty
+        #
+        # the files of a previous execution of the same phase are removed
+        # before launching the wrapper, otherwise follow_log and
+        # fetch_results might read them while the new command is starting
+        #
+        # in background, the wrapper is started in a new session, so that the
+        # pid it writes is also the id of the process group to kill (see
+        # __kill_cmd)
+
         decorated_cmd = '''cat << 'EOF' > {0}
+echo $$ > {15}
 touch {1}
 mkdir -p {2}
 cd {2}
@@ -234,15 +838,35 @@ cat << 'END2' > {3}
 set -e
 {4}
 END2
+{11}
 SECONDS=0
+T_START=$(date +%s%N)
 bash -e  {3} 1> {5} 2> {6}
 echo $? > {7}
-echo $SECONDS > {8}
+T_END=$(date +%s%N)
+case "$T_START$T_END" in
+  *[!0-9]*) echo $SECONDS > {8}; : > {14} ;;
+  *) T=$((T_END-T_START)); printf '%d.%09d\n' $((T/1000000000)) $((T%1000000000)) > {8}; echo $T_START $T_END > {14} ;;
+esac
+{12}
+tar -czf {9} -C /tmp {10} 2> /dev/null || rm -f {9}
 rm {1}
 exit `cat {7}`
 EOF
-bash {0}'''.format(script_wrapper, lock, working_dir, script, cmd, out,
-                   err, ret, runtime)
+rm -f {5} {6} {7} {8} {9} {13} {14} {15}
+'''.format(script_wrapper, lock, working_dir, script, cmd, out,
+                   err, ret, runtime, bundle, bundle_files,
+                   start_telemetry, stop_telemetry,
+                   self._get_filename(phase, 'cmd_telemetry'), timestamps,
+                   self._get_filename(phase, 'cmd_pid'))
+
+        if background:
+            # the lock file is created before returning, so that the caller
+            # can start waiting for its removal immediately
+            decorated_cmd += '''touch {1}
+nohup setsid bash {0} > /dev/null 2>&1 &'''.format(script_wrapper, lock)
+        else:
+            decorated_cmd += 'bash {0}'.format(script_wrapper)
 
         decorated_cmd += '\n'
 
@@ -37,6 +37,12 @@ class VM:
         self.memory = 0
         self.disk = 0
 
+        # the script to run on the vm to make it clean again before reusing it
+        # for another benchmark (see WarmVMPool) and the ids of the executions
+        # whose files it removes
+        self.reset_script = None
+        self.execution_ids = []
+
     def set_sizes(self, cpu, memory, disk):
         self.cpu = cpu
         self.memory = memory
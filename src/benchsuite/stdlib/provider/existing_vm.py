@@ -19,6 +19,7 @@
 from benchsuite.core.model.execution import ExecutionEnvironmentRequest, ExecutionEnvironment
 from benchsuite.core.model.provider import ServiceProvider
 from benchsuite.stdlib.execution.vm_environment import VM, VMSetExecutionEnvironment
+from benchsuite.stdlib.util.ssh import close_ssh_connections
 
 
 class ExistingVMProvider(ServiceProvider):
@@ -36,7 +37,8 @@ class ExistingVMProvider(ServiceProvider):
         self.vm = None
 
     def destroy_service(self):
-        pass
+        if self.vm:
+            close_ssh_connections([self.vm])
 
     def get_execution_environment(self, request: ExecutionEnvironmentRequest) -> ExecutionEnvironment:
 
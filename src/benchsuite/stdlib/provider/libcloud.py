@@ -21,12 +21,14 @@ import logging
 import random
 import string
 import time
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 
 from benchsuite.core.model.exception import ProviderConfigurationException
 from benchsuite.stdlib.util.libcloud_helper import get_helper, guess_platform, \
     guess_username
-from benchsuite.stdlib.util.ssh import run_ssh_cmd_single
+from benchsuite.stdlib.util.ssh import run_ssh_cmd_single, close_ssh_connections
+from benchsuite.stdlib.util.warm_pool import WarmVMPool, get_default_pool_file
 from benchsuite.core.model.execution import ExecutionEnvironmentRequest, ExecutionEnvironment
 from benchsuite.core.model.provider import ServiceProvider
 from benchsuite.stdlib.execution.vm_environment import VMSetExecutionEnvironment, VM
@@ -43,7 +45,12 @@ known_extra_keys = [
     'tenant',
     'new_vm.connection_retry_period',
     'new_vm.connection_retry_times',
-    'benchsuite.openstack.no_floating_ip'
+    'benchsuite.openstack.no_floating_ip',
+    'warm_pool.min_size',
+    'warm_pool.max_size',
+    'warm_pool.idle_ttl',
+    'warm_pool.file',
+    'warm_pool.replenish_on_destroy'
 ]
 
 class LibcloudComputeProvider(ServiceProvider):
@@ -105,29 +112,223 @@ class LibcloudComputeProvider(ServiceProvider):
 
 
     def get_execution_environment(self, request: ExecutionEnvironmentRequest) -> ExecutionEnvironment:
-        for n in request.vm_list:
-            if n not in self.vms_pool:
-                self.vms_pool[n] = self.__create_vm(n)
+        missing = [n for n in request.vm_list if n not in self.vms_pool]
+        if missing:
+            self.vms_pool.update(self.__get_warm_vms(missing))
+            missing = [n for n in missing if n not in self.vms_pool]
+        if missing:
+            self.vms_pool.update(self.__create_vms(missing))
         return VMSetExecutionEnvironment({x:self.vms_pool[x] for x in request.vm_list})
 
     def destroy_service(self):
         driver = self.__get_libcloud_drv()
-        nodes_id = [v.id for v in self.vms_pool.values()]
+
+        to_destroy = list(self.vms_pool.values())
+
+        # if the warm pool is enabled, the vms are put in the pool instead of
+        # being destroyed (if the pool is not full)
+        warm_pool = self.__get_warm_pool()
+        if warm_pool:
+            to_destroy = []
+            for vm in self.vms_pool.values():
+                added, evicted = warm_pool.release(self.__get_warm_pool_key(), vm)
+                to_destroy.extend(evicted)
+                if not added:
+                    to_destroy.append(vm)
+
+        close_ssh_connections(self.vms_pool.values())
+        self.__destroy_vms(driver, to_destroy)
+
+        # creating new vms while tearing down is opt-in: otherwise the pool is
+        # filled only by explicit calls to warm_up()
+        if warm_pool and self.extra_params.get('warm_pool.replenish_on_destroy', 'false').lower() == 'true':
+            try:
+                self.warm_up()
+            except Exception as ex:
+                logger.error('Error creating the VMs for the warm pool: {0}'.format(str(ex)))
+
+        if self.keypair_generated:
+            self.__get_helper().destroy_keypair(driver, self.key_name)
+
+    def warm_up(self):
+        """
+        creates new vms until the warm pool has at least warm_pool.min_size vms
+        """
+        warm_pool = self.__get_warm_pool()
+        if not warm_pool:
+            return
+
+        key = self.__get_warm_pool_key()
+        missing = warm_pool.min_size - warm_pool.size(key)
+        if missing <= 0:
+            return
+
+        logger.info('Creating {0} new VMs for the warm pool'.format(missing))
+        vms = self.__create_vms(['warm_{0}'.format(i) for i in range(missing)])
+
+        to_destroy = []
+        for vm in vms.values():
+            added, evicted = warm_pool.release(key, vm)
+            to_destroy.extend(evicted)
+            if not added:
+                to_destroy.append(vm)
+
+        close_ssh_connections(vms.values())
+        self.__destroy_vms(self.__get_libcloud_drv(), to_destroy)
+
+    def purge_warm_pool(self, drain=False):
+        """
+        destroys the vms of the warm pool idle since more than
+        warm_pool.idle_ttl seconds (or all of them, if drain is True)
+        """
+        warm_pool = self.__get_warm_pool()
+        if not warm_pool:
+            return
+
+        to_destroy = warm_pool.purge(drain=drain)
+        if to_destroy:
+            logger.info('Destroying {0} VMs of the warm pool'.format(len(to_destroy)))
+            close_ssh_connections(to_destroy)
+            self.__destroy_vms(self.__get_libcloud_drv(), to_destroy)
+
+    def __get_warm_pool(self):
+        max_size = int(self.extra_params.get('warm_pool.max_size', 0))
+        if not max_size:
+            return None
+
+        return WarmVMPool(
+            self.extra_params.get('warm_pool.file') or get_default_pool_file(),
+            min_size=int(self.extra_params.get('warm_pool.min_size', 0)),
+            max_size=max_size,
+            idle_ttl=int(self.extra_params.get('warm_pool.idle_ttl', 3600)))
+
+    def __get_warm_pool_key(self):
+        return WarmVMPool.get_key(
+            self.libcloud_type,
+            self.extra_params.get('ex_force_auth_url') or self.extra_params.get('region'),
+            self.access_id,
+            self.image,
+            self.size,
+            self.platform,
+            self.extra_params.get('network'))
+
+    def __get_warm_vms(self, benchsuite_names):
+        warm_pool = self.__get_warm_pool()
+        if not warm_pool:
+            return {}
+
+        res = {}
+        to_destroy = []
+        for n in benchsuite_names:
+            vm, evicted = warm_pool.acquire(self.__get_warm_pool_key())
+            to_destroy.extend(evicted)
+            if not vm:
+                break
+            vm.benchsuite_name = n
+            res[n] = vm
+
+        if to_destroy:
+            close_ssh_connections(to_destroy)
+            self.__destroy_vms(self.__get_libcloud_drv(), to_destroy)
+
+        return res
+
+    def __destroy_vms(self, driver, vms):
+        nodes_id = [v.id for v in vms]
         to_delete = [n for n in driver.list_nodes() if n.id in nodes_id]
         logger.info('{0} nodes to delete'.format(len(to_delete)))
         for n in to_delete:
             logger.info('Deleting node ' + n.id)
             n.destroy()
 
-        if self.keypair_generated:
-            self.__get_helper().destroy_keypair(driver, self.key_name)
+    def __create_vms(self, benchsuite_names):
+        """
+        creates the vms in bulk: all the nodes are requested first, then the
+        provisioning is waited for all of them at the same time and, finally,
+        the post-creation scripts are executed concurrently on all the vms.
 
-    def __create_vm(self, benchsuite_name):
+        If the creation of any of the vms fails, all the nodes created are
+        destroyed, to avoid to leave un-configured nodes running
+
+        :return: a dictionary benchsuite_name -> VM
+        """
 
         #1. get the driver
         driver = self.__get_libcloud_drv()
 
         #2. select the correct image and size
+        size, image = self.__get_size_and_image(driver)
+
+        logger.debug('Creating %d new Instances with image %s and size %s', len(benchsuite_names), image.name, size.name)
+
+        if not self.key_name or not self.ssh_private_key:
+            self.key_name, self.ssh_private_key = self.__get_helper().create_keypair(driver)
+            self.keypair_generated = True
+
+        extra_args = self.extra_params.copy()
+        extra_args.update(self.__get_newvm_network_param() or {})
+        extra_args.update(self.__get_newvm_security_group_param() or {})
+
+        # the floating ips are assigned after the nodes are running: if they
+        # are not enough, fail before creating (and then destroying) them
+        if self.__needs_floating_ips():
+            available = len(self.__get_available_public_ips(driver))
+            if available < len(benchsuite_names):
+                raise ProviderConfigurationException(
+                    '{0} floating ips needed, but only {1} available'.format(len(benchsuite_names), available))
+
+        nodes = {}
+        vms = {}
+
+        # any exception occurring from this point, will delete the created
+        # nodes, to avoid to leave un-configured nodes running
+        try:
+
+            for n in benchsuite_names:
+                nodes[n] = self.__create_node(driver, image, size, extra_args)
+
+            driver.wait_until_running(list(nodes.values()), wait_period=10, ssh_interface='private_ips')
+
+            #4. refresh the info of the nodes
+            names_by_uuid = {node.uuid: n for n, node in nodes.items()}
+            for node in driver.list_nodes():
+                if node.uuid in names_by_uuid:
+                    nodes[names_by_uuid[node.uuid]] = node
+                    logger.debug('New Instance created with node_id=%s', node.id)
+
+            # the floating ips are assigned one vm at the time, otherwise the
+            # same available ip could be selected for more than one vm
+            for n, node in nodes.items():
+                vms[n] = self.__get_vm(driver, n, node, image, size)
+
+            # exexute post-creation scripts. This is also used to verify that the VMs are accessible
+            # through ssh. If the execution fails on any VM, we destroy all the VMs
+            retries = int(self.extra_params.get('new_vm.connection_retry_times', 20))
+            with ThreadPoolExecutor(max_workers=len(vms)) as pool:
+                futures = [pool.submit(self.__execute_post_create, vm, retries) for vm in vms.values()]
+
+            for f in futures:
+                f.result()
+
+            for vm in vms.values():
+                logger.info('New VM %s created and initialized', vm)
+
+        except Exception as ex:
+            logger.error('{0} occurred during VMs initialization: {1}'.format(
+                ex.__class__.__name__, str(ex)))
+            logger.error('Destroying {0} VMs due to the initialization errors'.format(len(nodes)))
+            close_ssh_connections(vms.values())
+            # destroying the nodes created
+            for node in nodes.values():
+                try:
+                    node.destroy()
+                except Exception as dex:
+                    logger.error('Error destroying node {0}: {1}'.format(node.id, str(dex)))
+            raise ex
+
+        return vms
+
+    def __get_size_and_image(self, driver):
         # cache values
         if not self._sizes:
             self._sizes = driver.list_sizes()
@@ -148,109 +349,85 @@ class LibcloudComputeProvider(ServiceProvider):
             logger.debug('Requested image %s not available. Aborting', self.image)
             raise ProviderConfigurationException('Image {0} not available'.format(self.image))
 
+        return size, image
 
-        logger.debug('Creating new Instance with image %s and size %s', image.name, size.name)
-
+    def __create_node(self, driver, image, size, extra_args):
 
         #3. choose a random name for the vm
         rand_name = ''.join(
             [random.choice(string.ascii_lowercase + string.digits) for i in range(6)])
         name = 'benchsuite-'+rand_name
 
-        if not self.key_name or not self.ssh_private_key:
-            self.key_name, self.ssh_private_key = self.__get_helper().create_keypair(driver)
-            self.keypair_generated = True
-
-        extra_args = self.extra_params.copy()
-        extra_args.update(self.__get_newvm_network_param() or {})
-        extra_args.update(self.__get_newvm_security_group_param() or {})
-
         logger.debug('Creating node with:')
         logger.debug(' - name: %s', str(name))
         logger.debug(' - image: %s', str(image.name))
         logger.debug(' - size: %s', str(size.name))
         logger.debug(' - keyname: %s', str(self.key_name))
         logger.debug(' - extra_args: %s', extra_args)
-        node = driver.create_node(name=name, image=image, size=size, ex_keyname=self.key_name, **extra_args)
+        return driver.create_node(name=name, image=image, size=size, ex_keyname=self.key_name, **extra_args)
 
-        # any exception occurring from this point, will delete the created not,
-        # to avoid to leave un-configured nodes running
-        try :
+    def __get_vm(self, driver, benchsuite_name, node, image, size):
 
-            driver.wait_until_running([node], wait_period=10, ssh_interface='private_ips')
+        # if the node has not public ips, try to assign one
+        if not node.public_ips:
+            ip = self.__assign_floating_ip(driver, node)
+            if ip:
+                node.public_ips = [ip]
 
-            #4. refresh the info of the node
-            node = [i for i in driver.list_nodes() if i.uuid == node.uuid][0]
 
-            logger.debug('New Instance created with node_id=%s', node.id)
+        if node.public_ips:
+            vm_id = node.public_ips[0]
+        else:
+            vm_id = node.private_ips[0]
 
 
-            # if the node has not public ips, try to assign one
-            if not node.public_ips:
-                ip = self.__assign_floating_ip(driver, node)
-                if ip:
-                    node.public_ips = [ip]
+        platform = self.platform
+        if not platform:
+            platform = guess_platform(image)
+            logger.warning('"platform" not specified. Using "%s"', platform)
 
+        username = self.vm_user
+        if not username:
+            username = guess_username(platform)
+            logger.warning('"username" not specified. Using "%s"', username)
 
-            if node.public_ips:
-                vm_id = node.public_ips[0]
-            else:
-                vm_id = node.private_ips[0]
-
+        vm = VM(benchsuite_name, node.id, vm_id, username, platform,
+                working_dir=self.working_dir,
+                priv_key=self.ssh_private_key)
 
-            platform = self.platform
-            if not platform:
-                platform = guess_platform(image)
-                logger.warning('"platform" not specified. Using "%s"', platform)
-
-            username = self.vm_user
-            if not username:
-                username = guess_username(platform)
-                logger.warning('"username" not specified. Using "%s"', username)
-
-            vm = VM(benchsuite_name, node.id, vm_id, username, platform,
-                    working_dir=self.working_dir,
-                    priv_key=self.ssh_private_key)
-
-            vm.set_sizes(
-                # OpenStack driver put the number of cpu in the vcpus attribute, the Amazon driver put it in extra['cpu']
-                size.vcpus if hasattr(size, 'vcpus') else (size.extra['cpu'] if 'cpu' in size.extra else 0),
-                size.ram,
-                size.disk)
-
-
-            # exexute post-creation scripts. This is also used to verify that the VM is accessible
-            # through ssh. If the execution fails, we destroy the VM
-            self.__execute_post_create(vm, int(self.extra_params.get('new_vm.connection_retry_times', 20)))
-            logger.info('New VM %s created and initialized', vm)
-
-        except Exception as ex:
-            logger.error('{0} occurred during VM initialization: {1}'.format(
-                ex.__class__.__name__, str(ex)))
-            logger.error('Destroying VM due to the initialization errors')
-            # destroying the node created
-            node.destroy()
-            raise ex
+        vm.set_sizes(
+            # OpenStack driver put the number of cpu in the vcpus attribute, the Amazon driver put it in extra['cpu']
+            size.vcpus if hasattr(size, 'vcpus') else (size.extra['cpu'] if 'cpu' in size.extra else 0),
+            size.ram,
+            size.disk)
 
         return vm
 
 
-    def __assign_floating_ip(self, driver, node):
+    def __needs_floating_ips(self):
 
         if not self.libcloud_type == 'openstack':
             # supported only by openstack driver
             logger.debug('Public IP assignment only supported for Openstack.')
-            return
+            return False
 
         if 'benchsuite.openstack.no_floating_ip' in self.extra_params and \
             self.extra_params['benchsuite.openstack.no_floating_ip'] == 'true':
             # explicitly skip the floating ip assignment
             logger.debug('Public IP assigment will be skipped because '
                          'benchsuite.openstack.no_floating_ip is set to true')
+            return False
+
+        return True
+
+    def __assign_floating_ip(self, driver, node):
+
+        if not self.__needs_floating_ips():
             return
 
         try:
-            p_ip = self.__get_available_public_ip(driver)
+            available = self.__get_available_public_ips(driver)
+            p_ip = available[0] if available else None
 
             if p_ip:
                 logger.debug('Trying to assign the public ip %s to the new instance', p_ip)
@@ -262,14 +439,9 @@ class LibcloudComputeProvider(ServiceProvider):
             logger.error('Got exception assigning floating ip')
             return
 
-    def __get_available_public_ip(self, driver):
-        public_ips = driver.ex_list_floating_ips()
-
-        if public_ips:
-            av = [i for i in public_ips if not i.node_id]
-            if av:
-                return av[0]
-        return None
+    def __get_available_public_ips(self, driver):
+        # the ones not assigned to any node
+        return [i for i in driver.ex_list_floating_ips() or [] if not i.node_id]
 
     def __execute_post_create(self, vm, retries):
         logger.info('Trying to connect to the new instance (max_retries={0})'.format(retries))
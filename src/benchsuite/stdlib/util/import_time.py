@@ -0,0 +1,105 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+"""
+measures the time needed to import each module of the stdlib, to detect
+regressions in the startup time (e.g. a heavy dependency imported at module
+level). Each module is imported in a new interpreter, so that the modules
+already imported by the others are not shared. Usage:
+
+    python -m benchsuite.stdlib.util.import_time [--repeat N] [--max-ms MS]
+
+The exit status is 1 if the import of any module takes more than --max-ms
+milliseconds
+"""
+
+import argparse
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+
+
+# dependencies that should be imported only when they are actually used
+HEAVY_DEPENDENCIES = ['paramiko', 'cryptography', 'libcloud', 'pkg_resources']
+
+_MEASURE_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+__import__({0!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'time': elapsed, 'heavy': [m for m in {1!r} if m in sys.modules]}}))
+'''
+
+
+def get_modules():
+    """
+    :return: the names of all the modules of the stdlib (but this one), so
+    that the new modules are measured too
+    """
+    import benchsuite.stdlib
+    return sorted(m.name for m in pkgutil.walk_packages(benchsuite.stdlib.__path__, 'benchsuite.stdlib.')
+                  if not m.ispkg and m.name != 'benchsuite.stdlib.util.import_time')
+
+
+def measure_import(module, repeat=3):
+    """
+    :return: a tuple (best import time in seconds, heavy dependencies
+    imported by the module)
+    :raise subprocess.CalledProcessError: if the module cannot be imported
+    """
+    best = None
+    heavy = []
+    for i in range(repeat):
+        out = subprocess.check_output(
+            [sys.executable, '-c', _MEASURE_SCRIPT.format(module, HEAVY_DEPENDENCIES)],
+            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'), stderr=subprocess.DEVNULL)
+        res = json.loads(out.decode('utf-8').strip().splitlines()[-1])
+        best = res['time'] if best is None else min(best, res['time'])
+        heavy = res['heavy']
+    return best, heavy
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Measures the import time of the stdlib modules')
+    parser.add_argument('--repeat', type=int, default=3, help='imports of each module (the best is reported)')
+    parser.add_argument('--max-ms', type=float, default=None, help='fails if a module takes more than this')
+    parser.add_argument('modules', nargs='*', help='the modules to measure (default: all the stdlib modules)')
+    args = parser.parse_args(args)
+
+    failed = False
+    for m in args.modules or get_modules():
+        try:
+            elapsed, heavy = measure_import(m, repeat=args.repeat)
+        except subprocess.CalledProcessError:
+            print('{0:<50} cannot be imported'.format(m))
+            failed = True
+            continue
+        ms = elapsed * 1000
+        over = args.max_ms is not None and ms > args.max_ms
+        failed = failed or over
+        print('{0:<50} {1:8.1f} ms{2}{3}'.format(
+            m, ms, '  (imports: ' + ', '.join(heavy) + ')' if heavy else '', '  SLOW' if over else ''))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -23,13 +23,13 @@ import re
 import string
 from abc import ABC, abstractmethod
 
-from libcloud.compute.base import KeyPair
-from libcloud.compute.providers import get_driver
-
 from benchsuite.core.model.exception import ProviderConfigurationException
 
 logger = logging.getLogger(__name__)
 
+# libcloud is imported only when a driver is needed: the libcloud drivers
+# take long to import and are not needed, for instance, to list the benchmarks
+
 BENCHSUITE_SECURITY_GROUP_NAME = 'benchsuite_sg'
 BENCHSUITE_SECURITY_GROUP_DESCRIPTION = \
     'Automatically generated by the Benchmarking Suite'
@@ -68,6 +68,7 @@ class LibCloudHelper(ABC):
         return keypair.name, keypair.private_key
 
     def destroy_keypair(self, driver, keypair_name):
+        from libcloud.compute.base import KeyPair
         keypair = KeyPair(keypair_name, None, None, None)
         driver.delete_key_pair(keypair)
         logger.info('Keypair \'%s\' destroyed', keypair.name)
@@ -79,6 +80,7 @@ class OpenstackHelper(LibCloudHelper):
 
         driver = None
 
+        from libcloud.compute.providers import get_driver
         drv = get_driver('openstack')
 
         if 'auth_version' not in extra_params:
@@ -166,6 +168,7 @@ class OpenstackHelper(LibCloudHelper):
 class EC2Helper(LibCloudHelper):
 
     def get_driver(self, access_id, secret_key, extra_params):
+        from libcloud.compute.providers import get_driver
         drv = get_driver('ec2')
         return drv(access_id, secret_key, **extra_params)
 
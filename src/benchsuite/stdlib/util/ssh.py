@@ -19,11 +19,13 @@
 
 import re
 import logging
+import threading
+import time
+import atexit
+import zlib
 
 from io import StringIO
 
-import paramiko
-
 
 #
 # def get_data_dir():
@@ -38,24 +40,136 @@ import paramiko
 #
 # def get_environments_storage():
 #     return get_data_dir() + os.path.sep + 'environments.dat'
-from paramiko import RSAKey
 
 
 logger = logging.getLogger(__name__)
 
+class SSHConnectionPool:
+    """
+    Keeps one authenticated SSH connection for each VM, so that the commands
+    executed on the same VM share the same Transport and only open a new
+    channel instead of doing a full TCP and SSH handshake every time.
+
+    Connections are keyed by (ip, username, credentials). A connection that is
+    not active anymore is transparently re-established the next time it is
+    requested.
+
+    connect_timeout is the maximum time (in seconds) to open the TCP connection
+    and to receive the SSH banner of the VM. It can be overridden for a single
+    request (e.g. for a quick health check)
+    """
+
+    def __init__(self, keepalive=30, connect_timeout=60):
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self._clients = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_key(vm):
+        return vm.ip, vm.username, vm.priv_key or vm.password
+
+    def __get_key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get_client(self, vm, connect_timeout=None):
+        key = self._get_key(vm)
+
+        # the connection is established holding only the lock of this key, so
+        # that connections to different VMs can be opened concurrently
+        with self.__get_key_lock(key):
+            client = self._clients.get(key)
+            if client and self.__is_alive(client):
+                return client
+
+            if client:
+                logger.debug('Connection to {0} is not active anymore. Reconnecting'.format(vm.ip))
+                client.close()
+
+            client = self.__connect(vm, connect_timeout or self.connect_timeout)
+            self._clients[key] = client
+            return client
+
+    def invalidate(self, vm):
+        """
+        closes the connection to the vm (if any). The next request will open a
+        new one
+        """
+        key = self._get_key(vm)
+        with self.__get_key_lock(key):
+            client = self._clients.pop(key, None)
+            if client:
+                client.close()
+
+    def close_all(self):
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for c in clients:
+            c.close()
+
+    @staticmethod
+    def __is_alive(client):
+        transport = client.get_transport()
+        return transport is not None and transport.is_active() and transport.is_authenticated()
+
+    def __connect(self, vm, timeout):
+        # paramiko (and cryptography) are imported only when a connection is
+        # needed, they take long to import
+        import paramiko
+
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+        logger.debug('Opening a new ssh connection to {0}@{1}'.format(vm.username, vm.ip))
+        try:
+            if vm.priv_key:
+                pkey = paramiko.RSAKey.from_private_key(StringIO(vm.priv_key))  # assuming it is an RSAKey
+                ssh.connect(hostname=vm.ip, port=22, username=vm.username, pkey=pkey,
+                            timeout=timeout, banner_timeout=timeout)
+            else:
+                ssh.connect(hostname=vm.ip, port=22, username=vm.username, password=vm.password,
+                            timeout=timeout, banner_timeout=timeout)
+        except Exception:
+            ssh.close()
+            raise
+
+        if self.keepalive:
+            ssh.get_transport().set_keepalive(self.keepalive)
+
+        return ssh
+
+
+_pool = SSHConnectionPool()
+
+atexit.register(_pool.close_all)
+
+
+def get_ssh_connection_pool():
+    return _pool
+
+
+def close_ssh_connections(vms):
+    """
+    closes the pooled connections to the given vms. To be called when the
+    environment the vms belong to is torn down
+    """
+    for vm in vms:
+        _pool.invalidate(vm)
+
+
 def ssh_transfer_output(vm, name, dest):
     out = '/tmp/' + name + '.out'
+    sftp = _pool.get_client(vm).open_sftp()
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(hostname=vm.ip, port=22, username=vm.username, key_filename=vm.keyfile)
-        sftp = ssh.open_sftp()
         sftp.get(out, dest)
     finally:
-        ssh.close()
+        sftp.close()
 
 
-def run_ssh_cmd(vm, cmd, _async=False, needs_pty=False, retry_times=3):
+def run_ssh_cmd(vm, cmd, _async=False, needs_pty=False, retry_times=3, timeout=None):
 
     retry_counter = retry_times
 
@@ -63,7 +177,7 @@ def run_ssh_cmd(vm, cmd, _async=False, needs_pty=False, retry_times=3):
         retry_counter -= 1
 
         try:
-            return run_ssh_cmd_single(vm, cmd, _async=_async, needs_pty=needs_pty)
+            return run_ssh_cmd_single(vm, cmd, _async=_async, needs_pty=needs_pty, timeout=timeout)
 
         except Exception as ex:
             if retry_counter > 0:
@@ -73,7 +187,7 @@ def run_ssh_cmd(vm, cmd, _async=False, needs_pty=False, retry_times=3):
                                'Not retrying because max retry times ({1}) exceeded. Raising the exeception'.format(str(ex), retry_times))
                 raise ex
 
-def run_ssh_cmd_single(vm, cmd, _async=False, needs_pty=False):
+def run_ssh_cmd_single(vm, cmd, _async=False, needs_pty=False, timeout=None, connect_timeout=None):
     '''
     sometime /etc/sudoers is configured to require a tty to execute a command with sudo. In this case, set needs_pty to
     True. But if needs_pty is True, you cannot run a command asyncrounously (check if this is really true)
@@ -86,43 +200,190 @@ def run_ssh_cmd_single(vm, cmd, _async=False, needs_pty=False):
     :param vm: 
     :param cmd: 
     :param needs_pty: 
+    :param timeout: if set, a socket.timeout is raised if no data is received
+    on the channel for this number of seconds
+    :param connect_timeout: if set, overrides the connect timeout of the pool
+    when a new connection to the vm is needed
     :return: 
     '''
 
-    try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        if vm.priv_key:
-            pkey = RSAKey.from_private_key(StringIO(vm.priv_key))  # assuming it is an RSAKey
-            ssh.connect(hostname=vm.ip, port=22, username=vm.username, pkey=pkey)
-        else:
-            ssh.connect(hostname=vm.ip, port=22, username=vm.username, password=vm.password)
-
-        logger.debug('Executing command on the remote host {0}: {1}'.format(vm.benchsuite_name, cmd))
-        stdin, stdout, stderr = ssh.exec_command(cmd, get_pty=needs_pty)
+    stdin, stdout, stderr = _exec_command(vm, cmd, needs_pty=needs_pty, timeout=timeout,
+                                          connect_timeout=connect_timeout)
 
+    channel = stdout.channel
+    try:
         if _async:
             return (0, '', '')
 
         out = sanitize_output(stdout.read().decode("utf-8"))
         err = sanitize_output(stderr.read().decode("utf-8"))
 
-        exit_status = stdout.channel.recv_exit_status()
+        exit_status = channel.recv_exit_status()
 
         return (exit_status, out, err)
 
-        # chan = ssh.get_transport().open_session()
-        # chan.get_pty()
-        # chan.exec_command(cmd)
-        # print(chan.recv(1024))
+    finally:
+        # only the channel is closed, the transport is kept for the next
+        # commands
+        channel.close()
+
+
+
+def _exec_command(vm, cmd, needs_pty=False, timeout=None, connect_timeout=None):
+    ssh = _pool.get_client(vm, connect_timeout=connect_timeout)
+
+    try:
+        logger.debug('Executing command on the remote host {0}: {1}'.format(vm.benchsuite_name, cmd))
+        return ssh.exec_command(cmd, get_pty=needs_pty, timeout=timeout)
+    except Exception:
+        # the transport might be broken: drop it so that the next attempt
+        # reconnects
+        _pool.invalidate(vm)
+        raise
+
+
+def ssh_stream_file(vm, path, compress=True, chunk_size=65536):
+    '''
+    yields the content of a remote file in chunks of bytes, without loading
+    the whole file in memory.
+
+    If compress is True, the file is compressed with gzip on the vm and
+    decompressed here while it is received. An IOError is raised at the end
+    if the file cannot be read (e.g. gzip is not available on the vm)
+    '''
+    if compress:
+        cmd = 'gzip -1 -c ' + path
+        decompressor = zlib.decompressobj(wbits=31)
+    else:
+        cmd = 'cat ' + path
+        decompressor = None
+
+    stdin, stdout, stderr = _exec_command(vm, cmd)
+    channel = stdout.channel
+    try:
+        while True:
+            chunk = channel.recv(chunk_size)
+            if not chunk:
+                break
+            if decompressor:
+                chunk = decompressor.decompress(chunk)
+            if chunk:
+                yield chunk
+
+        if decompressor:
+            chunk = decompressor.flush()
+            if chunk:
+                yield chunk
+
+        exit_status = channel.recv_exit_status()
+        if exit_status != 0:
+            raise IOError('Cannot read {0} on {1} ({2}): {3}'.format(
+                path, vm.benchsuite_name, exit_status, stderr.read().decode('utf-8')))
+
+    finally:
+        channel.close()
+
+
+def ssh_follow_files(vm, out_path, err_path, lock_path, offsets=(0, 0), period=1, chunk_size=65536):
+    '''
+    follows two remote files that are growing (e.g. the stdout and the stderr
+    of a command) over a single channel, until the lock file is removed. Only
+    the bytes after the given offsets are transferred: the new bytes of
+    out_path are sent on the stdout of the channel, the ones of err_path on
+    the stderr.
+
+    Yields tuples (0 for out_path or 1 for err_path, bytes). All the bytes
+    written before the removal of the lock file are yielded. An IOError is
+    raised if the channel is closed before the end
+    '''
+    # the existence of the lock is checked before reading, so that the last
+    # read after its removal includes everything
+    cmd = '''send() {{ s=$(stat -c %s "$1" 2> /dev/null || echo 0); test "$s" -gt "$2" || {{ s=$2; return 0; }}; tail -c +$(($2+1)) "$1" | head -c $((s-$2)); }}
+o0={3}; o1={4}
+while :; do
+  test -f {2}; running=$?
+  send {0} $o0; o0=$s
+  send {1} $o1 >&2; o1=$s
+  test $running -ne 0 && exit 0
+  sleep {5}
+done'''.format(out_path, err_path, lock_path, offsets[0], offsets[1], period)
+
+    stdin, stdout, stderr = _exec_command(vm, cmd)
+    channel = stdout.channel
+    try:
+        while True:
+            received = False
+            if channel.recv_ready():
+                received = True
+                yield 0, channel.recv(chunk_size)
+            if channel.recv_stderr_ready():
+                received = True
+                yield 1, channel.recv_stderr(chunk_size)
+            if received:
+                continue
+            if channel.exit_status_ready():
+                # the data is always received before the exit status
+                if not channel.recv_ready() and not channel.recv_stderr_ready():
+                    break
+            elif channel.closed:
+                raise IOError('Channel following {0} on {1} closed unexpectedly'.format(
+                    out_path, vm.benchsuite_name))
+            else:
+                time.sleep(0.1)
+
+        exit_status = channel.recv_exit_status()
+        if exit_status != 0:
+            raise IOError('Cannot follow {0} on {1} (exit status {2})'.format(
+                out_path, vm.benchsuite_name, exit_status))
 
     finally:
-        ssh.close()
+        channel.close()
+
+
+class SanitizedTextFile:
+    '''
+    wraps a binary file-like object and gives access to its content as text,
+    removing the ansi escape sequences from each line (like sanitize_output
+    does for strings). It can be iterated line by line
+    '''
+
+    def __init__(self, binary_file, encoding='utf-8'):
+        self._file = binary_file
+        self.encoding = encoding
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def readline(self):
+        # lines are decoded one by one: in utf-8 a "\n" byte is never part of
+        # a multi-byte character
+        return sanitize_output(self._file.readline().decode(self.encoding, errors='replace'))
+
+    def read(self):
+        return sanitize_output(self._file.read().decode(self.encoding, errors='replace'))
+
+    def seek(self, offset):
+        return self._file.seek(offset)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 
+_ansi_escape = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
 
 
 def sanitize_output(strin):
     # remove ansi escape sequences
-    ansi_escape = re.compile(r'(\x9B|\x1B\[)[0-?]*[ -\/]*[@-~]')
-    return ansi_escape.sub('', strin)
+    return _ansi_escape.sub('', strin)
@@ -0,0 +1,155 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# the columns of the telemetry time series. The cpu times are the jiffies
+# of /proc/stat, the memory is in bytes and the disk and network columns
+# are the bytes transferred since the boot (the loopback interface and the
+# partitions, loop, ram and device-mapper disks are excluded)
+TELEMETRY_COLUMNS = [
+    'time',
+    'cpu_user', 'cpu_nice', 'cpu_system', 'cpu_idle', 'cpu_iowait',
+    'cpu_irq', 'cpu_softirq', 'cpu_steal',
+    'mem_total', 'mem_available',
+    'disk_read_bytes', 'disk_write_bytes',
+    'net_rx_bytes', 'net_tx_bytes'
+]
+
+CPU_COLUMNS = [c for c in TELEMETRY_COLUMNS if c.startswith('cpu_')]
+
+# a single awk process reads all the /proc files for each sample, so that the
+# sampler forks only date and awk every interval
+_SAMPLE_CMD = '''awk -v t="$(date +%s.%N)" '
+FILENAME == "/proc/stat" && $1 == "cpu" { u = $2; n = $3; s = $4; i = $5; w = $6; q = $7; sq = $8; st = $9 }
+FILENAME == "/proc/meminfo" { m[$1] = $2 * 1024 }
+FILENAME == "/proc/diskstats" && $3 !~ /^(loop|ram|dm-)/ && $3 !~ /^(sd|vd|xvd|hd)[a-z]+[0-9]+$/ && $3 !~ /^(nvme|mmcblk).*p[0-9]+$/ { rd += $6; wr += $10 }
+FILENAME == "/proc/net/dev" && FNR > 2 { sub(/^ +/, ""); split($0, a, /[: ]+/); if (a[1] != "lo") { rx += a[2]; tx += a[10] } }
+END { printf "%s,%d,%d,%d,%d,%d,%d,%d,%d,%.0f,%.0f,%.0f,%.0f,%.0f,%.0f\\n", t, u, n, s, i, w, q, sq, st, m["MemTotal:"], m["MemAvailable:"], rd * 512, wr * 512, rx, tx }
+' /proc/stat /proc/meminfo /proc/diskstats /proc/net/dev >> {0} 2> /dev/null'''
+
+
+def get_sampler_commands(csv_file, interval):
+    """
+    :return: the bash commands that start the sampler in background (the pid
+    is stored in the variable TELEMETRY_PID) and the ones that stop it and
+    take the last sample
+    """
+    start = '''telemetry_sample() {{ {0}; }}
+echo {1} > {2}
+( while :; do telemetry_sample; sleep {3}; done ) &
+TELEMETRY_PID=$!'''.format(_SAMPLE_CMD.replace('{0}', csv_file), ','.join(TELEMETRY_COLUMNS), csv_file, interval)
+
+    stop = '''kill $TELEMETRY_PID 2> /dev/null
+wait $TELEMETRY_PID 2> /dev/null
+telemetry_sample'''
+
+    return start, stop
+
+
+def parse_telemetry(text):
+    """
+    :return: the time series as a dictionary column -> list of values. The
+    incomplete lines (e.g. the last one, if the sampler has been killed while
+    writing it) are skipped
+    """
+    lines = text.splitlines()
+    if not lines:
+        return {c: [] for c in TELEMETRY_COLUMNS}
+
+    columns = lines[0].strip().split(',')
+    res = {c: [] for c in columns}
+    for l in lines[1:]:
+        values = l.strip().split(',')
+        if len(values) != len(columns):
+            continue
+        try:
+            values = [float(values[0])] + [int(v) for v in values[1:]]
+        except ValueError:
+            continue
+        for c, v in zip(columns, values):
+            res[c].append(v)
+
+    return res
+
+
+def get_telemetry_metrics(series):
+    """
+    summarizes the time series of a phase (see parse_telemetry): the
+    percentage of cpu time spent in each state, the memory used and the
+    average disk and network throughput. The steal and iowait peaks are
+    computed over the single intervals
+
+    :return: a dictionary of metrics (empty if there are less than two
+    samples)
+    """
+    t = series.get('time') or []
+    if len(t) < 2 or t[-1] <= t[0]:
+        return {}
+
+    def delta(c, i=0, j=-1):
+        return series[c][j] - series[c][i]
+
+    def cpu_total(i, j):
+        return sum([delta(c, i, j) for c in CPU_COLUMNS])
+
+    total = cpu_total(0, -1)
+    elapsed = t[-1] - t[0]
+    res = {}
+
+    if total > 0:
+        busy = total - delta('cpu_idle') - delta('cpu_iowait')
+        res['telemetry_cpu_busy'] = {'value': 100.0 * busy / total, 'unit': '%'}
+        for c in ['cpu_user', 'cpu_system', 'cpu_iowait', 'cpu_steal']:
+            res['telemetry_' + c] = {'value': 100.0 * delta(c) / total, 'unit': '%'}
+
+        for c in ['cpu_iowait', 'cpu_steal']:
+            peaks = [100.0 * delta(c, i - 1, i) / cpu_total(i - 1, i)
+                     for i in range(1, len(t)) if cpu_total(i - 1, i) > 0]
+            if peaks:
+                res['telemetry_{0}_max'.format(c)] = {'value': max(peaks), 'unit': '%'}
+
+    used = [total_mem - available for total_mem, available in zip(series['mem_total'], series['mem_available'])]
+    res['telemetry_mem_used_max'] = {'value': max(used), 'unit': 'bytes'}
+    res['telemetry_mem_available_min'] = {'value': min(series['mem_available']), 'unit': 'bytes'}
+
+    for c in ['disk_read_bytes', 'disk_write_bytes', 'net_rx_bytes', 'net_tx_bytes']:
+        res['telemetry_{0}_rate'.format(c[:-6])] = {'value': delta(c) / elapsed, 'unit': 'bytes/s'}
+
+    return res
+
+
+def get_logs_telemetry_metrics(logs):
+    """
+    summarizes the telemetry of each vm in the logs returned by
+    collect_results (see get_telemetry_metrics). If more vms have been
+    sampled, the name of the vm is added to the metric names (e.g.
+    telemetry_server_cpu_busy)
+    """
+    sampled = [l for l in logs if l.get('telemetry')]
+    res = {}
+    for l in sampled:
+        for k, v in get_telemetry_metrics(l['telemetry']).items():
+            if len(sampled) > 1:
+                k = 'telemetry_{0}_{1}'.format(l['vm'], k[len('telemetry_'):])
+            res[k] = v
+    return res
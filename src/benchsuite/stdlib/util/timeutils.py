@@ -17,6 +17,10 @@
 # Developed in the ARTIST EU project (www.artist-project.eu) and in the
 # CloudPerfect EU project (https://cloudperfect.eu/)
 
+import threading
+import time
+from contextlib import contextmanager
+
 
 def convert_to_h_m_s(seconds):
 
@@ -31,3 +35,81 @@ def convert_to_h_m_s(seconds):
 
     return time_string
 
+
+
+class TimingTrace:
+    """
+    records how long each step of the execution of a benchmark takes on the
+    client side (e.g. connecting to the vms, launching the scripts, waiting
+    for their termination and collecting the results) and the runtime of
+    each phase measured on the vms. Steps on different vms can be recorded
+    concurrently
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # the trace is stored with the execution
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name, phase=None, vm=None):
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_step(name, started, time.perf_counter() - start, phase=phase, vm=vm)
+
+    def add_step(self, name, started, duration, phase=None, vm=None):
+        with self._lock:
+            self.steps.append({'step': name, 'phase': phase, 'vm': vm,
+                               'started': started, 'duration': duration})
+
+    def set_phase_time(self, phase, vm, started, ended):
+        """
+        stores the start and the end (seconds since the epoch) of a phase
+        as recorded on the vm
+        """
+        with self._lock:
+            self.phases[(phase, vm)] = (started, ended)
+
+    def clear_phase_time(self, phase, vm):
+        """
+        removes the start and the end of a previous execution of the phase
+        """
+        with self._lock:
+            self.phases.pop((phase, vm), None)
+
+    def get_phase_time(self, phase, vm):
+        """
+        :return: a tuple (start, end) or None if the phase has not been
+        recorded
+        """
+        return self.phases.get((phase, vm))
+
+    def get_steps(self, name=None, phase=None, vm=None):
+        with self._lock:
+            return [s for s in self.steps
+                    if (name is None or s['step'] == name)
+                    and (phase is None or s['phase'] == phase)
+                    and (vm is None or s['vm'] == vm)]
+
+    def get_summary(self):
+        """
+        :return: a dictionary step -> total seconds spent in that step (on
+        all the vms and phases)
+        """
+        res = {}
+        for s in self.get_steps():
+            res[s['step']] = res.get(s['step'], 0.0) + s['duration']
+        return res
@@ -0,0 +1,209 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import fcntl
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from benchsuite.stdlib.execution.vm_environment import VM
+from benchsuite.stdlib.util.ssh import run_ssh_cmd, run_ssh_cmd_single
+
+logger = logging.getLogger(__name__)
+
+
+def get_default_pool_file():
+    from appdirs import user_data_dir
+    return os.path.join(user_data_dir('benchmarking-suite', None), 'warm-vms.json')
+
+
+class WarmVMPool:
+    """
+    A pool of VMs already created and initialized that are kept running
+    between sessions, so that new executions can reuse them instead of
+    creating new VMs.
+
+    VMs are grouped by a key (e.g. provider, image, size, platform, network)
+    and stored in a json file shared by all the processes. Each key keeps at
+    most max_size VMs; the ones idle since more than idle_ttl seconds are
+    evicted, but never below min_size.
+    """
+
+    def __init__(self, storage_file, min_size=0, max_size=0, idle_ttl=3600):
+        self.storage_file = storage_file
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+
+    @staticmethod
+    def get_key(*args):
+        return '|'.join([str(a or '') for a in args])
+
+    def acquire(self, key):
+        """
+        returns a healthy VM from the pool (removing it from the pool) and the
+        list of the VMs evicted because expired or not healthy. The caller
+        must destroy the evicted VMs
+
+        :return: a tuple (vm or None, evicted vms)
+        """
+        evicted = []
+        while True:
+            with self.__storage() as pool:
+                evicted.extend(self.__evict_expired(pool))
+                entries = pool.get(key, [])
+                if not entries:
+                    return None, evicted
+                # the most recently used one
+                entry = entries.pop()
+
+            vm = self.__to_vm(entry)
+            if self.__is_healthy(vm):
+                logger.info('Reusing VM %s from the warm pool', vm)
+                return vm, evicted
+
+            logger.warning('VM %s in the warm pool is not healthy. Evicting it', vm)
+            evicted.append(vm)
+
+    def release(self, key, vm):
+        """
+        resets the vm and adds it to the pool. If the pool is already full or
+        the reset fails, the vm is not added
+
+        :return: a tuple (True if the vm has been added, evicted vms)
+        """
+        with self.__storage() as pool:
+            evicted = self.__evict_expired(pool)
+            if len(pool.get(key, [])) >= self.max_size:
+                return False, evicted
+
+        if not self.__reset(vm):
+            return False, evicted
+
+        with self.__storage() as pool:
+            # the reset might take long
+            evicted.extend(self.__evict_expired(pool))
+            entries = pool.setdefault(key, [])
+            if len(entries) >= self.max_size:
+                return False, evicted
+            entries.append(self.__to_entry(vm))
+
+        logger.info('VM %s added to the warm pool', vm)
+        return True, evicted
+
+    def purge(self, drain=False):
+        """
+        evicts the VMs idle since more than idle_ttl seconds (or all the VMs,
+        if drain is True) without waiting for the next acquire or release,
+        e.g. at the exit of the program. The caller must destroy the evicted
+        VMs
+
+        :return: the evicted vms
+        """
+        with self.__storage() as pool:
+            if not drain:
+                return self.__evict_expired(pool)
+
+            evicted = [self.__to_vm(e) for entries in pool.values() for e in entries]
+            pool.clear()
+            return evicted
+
+    def size(self, key):
+        with self.__storage() as pool:
+            return len(pool.get(key, []))
+
+    def __evict_expired(self, pool):
+        now = time.time()
+        evicted = []
+        for key, entries in pool.items():
+            # entries are ordered from the least recently used
+            while len(entries) > self.min_size and now - entries[0]['last_used'] > self.idle_ttl:
+                vm = self.__to_vm(entries.pop(0))
+                logger.info('VM %s idle since more than %s seconds. Evicting it', vm, self.idle_ttl)
+                evicted.append(vm)
+        return evicted
+
+    @staticmethod
+    def __is_healthy(vm):
+        try:
+            exit_status, _, _ = run_ssh_cmd_single(vm, 'true', timeout=30, connect_timeout=30)
+            return exit_status == 0
+        except Exception as ex:
+            logger.debug('Health check of VM %s failed: %s', vm, str(ex))
+            return False
+
+    @staticmethod
+    def __reset(vm):
+        reset_script = getattr(vm, 'reset_script', None)
+        if not reset_script:
+            return True
+
+        logger.info('Resetting VM %s before adding it to the warm pool', vm)
+        try:
+            exit_status, _, err = run_ssh_cmd(vm, reset_script)
+        except Exception as ex:
+            logger.warning('Reset of VM %s failed: %s', vm, str(ex))
+            return False
+
+        if exit_status != 0:
+            logger.warning('Reset of VM %s exited with status %s: %s', vm, exit_status, err)
+            return False
+
+        vm.reset_script = None
+        vm.execution_ids = []
+        return True
+
+    @staticmethod
+    def __to_entry(vm):
+        entry = {k: v for k, v in vm.__dict__.items() if k not in ['reset_script', 'execution_ids']}
+        entry['last_used'] = time.time()
+        return entry
+
+    @staticmethod
+    def __to_vm(entry):
+        vm = VM(entry['benchsuite_name'], entry['id'], entry['ip'], entry['username'],
+                entry['platform'], working_dir=entry['working_dir'],
+                priv_key=entry['priv_key'], password=entry['password'])
+        vm.set_sizes(entry['cpu'], entry['memory'], entry['disk'])
+        return vm
+
+    @contextmanager
+    def __storage(self):
+        """
+        loads the pool from the storage file and writes it back at the end.
+        The file is locked for the whole time, so that concurrent processes
+        do not get the same vm
+        """
+        os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
+
+        # the file contains the private keys
+        fd = os.open(self.storage_file, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                content = f.read()
+                pool = json.loads(content) if content else {}
+                yield pool
+                f.seek(0)
+                f.truncate()
+                json.dump({k: v for k, v in pool.items() if v}, f)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,105 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+"""
+executes the commands that the RemoteSSHExecutor sends to the vms with a
+local bash, so that the executor can be tested without ssh
+"""
+
+import os
+import select
+import subprocess
+import types
+import uuid
+from unittest import mock
+
+
+def run_local(vm, cmd, _async=False, needs_pty=False, retry_times=3, timeout=None, connect_timeout=None):
+    p = subprocess.run(['bash', '-c', cmd], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return p.returncode, p.stdout.decode('utf-8'), p.stderr.decode('utf-8')
+
+
+class LocalChannel:
+    """
+    the methods of a paramiko channel used by benchsuite.stdlib.util.ssh
+    """
+
+    closed = False
+
+    def __init__(self, process):
+        self.process = process
+        self.files = [process.stdout, process.stderr]
+        self.pending = [b'', b'']
+
+    def __ready(self, i):
+        if not self.pending[i] and select.select([self.files[i]], [], [], 0)[0]:
+            self.pending[i] = os.read(self.files[i].fileno(), 65536)
+        return bool(self.pending[i])
+
+    def __recv(self, i, n):
+        data = self.pending[i] or os.read(self.files[i].fileno(), n)
+        self.pending[i] = data[n:]
+        return data[:n]
+
+    def recv_ready(self):
+        return self.__ready(0)
+
+    def recv_stderr_ready(self):
+        return self.__ready(1)
+
+    def recv(self, n):
+        return self.__recv(0, n)
+
+    def recv_stderr(self, n):
+        return self.__recv(1, n)
+
+    def exit_status_ready(self):
+        return self.process.poll() is not None
+
+    def recv_exit_status(self):
+        return self.process.wait()
+
+    def close(self):
+        self.process.stdout.close()
+        self.process.stderr.close()
+
+
+def exec_local(vm, cmd, needs_pty=False, timeout=None, connect_timeout=None):
+    p = subprocess.Popen(['bash', '-c', cmd], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return None, types.SimpleNamespace(channel=LocalChannel(p)), types.SimpleNamespace(read=p.stderr.read)
+
+
+def patch_ssh():
+    """
+    :return: the patchers of the ssh functions used by the executor (to be
+    started by the test)
+    """
+    pool = types.SimpleNamespace(get_client=lambda vm, connect_timeout=None: None)
+    return [
+        mock.patch('benchsuite.stdlib.execution.sshexecutor.run_ssh_cmd', run_local),
+        mock.patch('benchsuite.stdlib.execution.sshexecutor.run_ssh_cmd_single', run_local),
+        mock.patch('benchsuite.stdlib.execution.sshexecutor.get_ssh_connection_pool', lambda: pool),
+        mock.patch('benchsuite.stdlib.util.ssh._exec_command', exec_local)
+    ]
+
+
+def new_execution(benchmark, vms, session_props=None):
+    return types.SimpleNamespace(id=str(uuid.uuid4()), test=benchmark,
+                                 exec_env=types.SimpleNamespace(vms=vms),
+                                 session=types.SimpleNamespace(props=session_props or {}))
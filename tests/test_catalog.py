@@ -0,0 +1,117 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchsuite.stdlib.benchmark.catalog import WorkloadCatalog
+
+
+BENCHMARKS_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks')
+
+CONFIG = '''
+[DEFAULT]
+class = benchsuite.stdlib.benchmark.vm_benchmark.BashCommandBenchmark
+tool_name = Tool
+categories = cpu
+execute = tool --size %(size)s
+size = 1
+
+[small]
+workload_name = Small
+
+[big]
+workload_name = Big
+size = 100
+categories = cpu, memory
+'''
+
+
+class WorkloadCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.folder = os.path.join(self.dir, 'benchmarks')
+        os.mkdir(self.folder)
+        self.cache_file = os.path.join(self.dir, 'cache', 'catalog.json')
+        self.write_config(CONFIG, 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write_config(self, content, mtime):
+        path = os.path.join(self.folder, 'tool.conf')
+        with open(path, 'w') as f:
+            f.write(content)
+        os.utime(path, (mtime, mtime))
+
+    def new_catalog(self):
+        return WorkloadCatalog([self.folder], cache_file=self.cache_file)
+
+    def list_workloads(self, **kwargs):
+        return [w['workload'] for w in self.new_catalog().list_workloads(**kwargs)]
+
+    def test_index(self):
+        catalog = self.new_catalog()
+        self.assertEqual(catalog.list_tools(), ['tool'])
+        self.assertEqual(self.list_workloads(category='MEMORY'), ['big'])
+        self.assertEqual(catalog.get_workload('tool', 'big')['categories'], ['cpu', 'memory'])
+        self.assertIsNone(catalog.get_workload('tool', 'medium'))
+
+        benchmark = catalog.get_benchmark('tool', 'big')
+        self.assertEqual(benchmark.workload_name, 'Big')
+        self.assertEqual(benchmark._props['execute'], 'tool --size 100')
+
+    def test_cache(self):
+        self.assertEqual(self.list_workloads(), ['small', 'big'])
+        self.assertTrue(os.path.isfile(self.cache_file))
+
+        parse = 'benchsuite.stdlib.benchmark.catalog.WorkloadCatalog._WorkloadCatalog__parse'
+
+        # same modification time or same content: the file is not parsed
+        with mock.patch(parse) as p:
+            self.assertEqual(self.list_workloads(), ['small', 'big'])
+            self.write_config(CONFIG, 2000)
+            self.assertEqual(self.list_workloads(), ['small', 'big'])
+            p.assert_not_called()
+
+        # the content changes
+        self.write_config(CONFIG + '\n[medium]\nsize = 10\n', 3000)
+        self.assertEqual(self.list_workloads(), ['small', 'big', 'medium'])
+
+    def test_first_folder_wins(self):
+        other = os.path.join(self.dir, 'other')
+        os.mkdir(other)
+        with open(os.path.join(other, 'tool.conf'), 'w') as f:
+            f.write('[DEFAULT]\n[other]\n')
+        catalog = WorkloadCatalog([other, self.folder])
+        self.assertEqual([w['workload'] for w in catalog.list_workloads()], ['other'])
+
+    def test_stdlib_benchmarks(self):
+        catalog = WorkloadCatalog([BENCHMARKS_FOLDER])
+        self.assertIn('iperf', catalog.list_tools())
+        for w in catalog.list_workloads(tool='iperf'):
+            self.assertEqual(catalog.get_benchmark('iperf', w['workload']).workload_id, w['workload'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import types
+import unittest
+from unittest import mock
+
+from benchsuite.stdlib.benchmark.parser_registry import ParserRegistry, ENTRY_POINTS_GROUP
+from benchsuite.stdlib.benchmark.parsers import YCSBResultParser, IPerfResultParser
+
+
+class FakeParser:
+    pass
+
+
+def entry_point(name, parser_class):
+    return types.SimpleNamespace(name=name, load=lambda: parser_class)
+
+
+class ParserRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ParserRegistry()
+        self.patcher = mock.patch('pkg_resources.iter_entry_points', return_value=[
+            entry_point('ycsb', YCSBResultParser), entry_point('fake', FakeParser)])
+        self.iter_entry_points = self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    def test_class_name(self):
+        parser = self.registry.get_parser('benchsuite.stdlib.benchmark.parsers.IPerfResultParser')
+        self.assertIsInstance(parser, IPerfResultParser)
+        self.assertIs(self.registry.get_parser('benchsuite.stdlib.benchmark.parsers.IPerfResultParser'), parser)
+        self.iter_entry_points.assert_not_called()
+
+    def test_entry_point(self):
+        self.assertIsInstance(self.registry.get_parser('ycsb'), YCSBResultParser)
+        self.assertIs(self.registry.get_class('fake'), FakeParser)
+        self.iter_entry_points.assert_called_once_with(ENTRY_POINTS_GROUP)
+
+    def test_not_a_class_name(self):
+        # the names with dots that are not classes are searched in the
+        # entry points too
+        for name in ['benchsuite.stdlib.benchmark.missing.Parser', 'benchsuite.stdlib.benchmark.parsers.Missing']:
+            self.assertRaises(ValueError, self.registry.get_class, name)
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, self.registry.get_parser, 'unknown')
+
+    def test_register(self):
+        self.registry.get_parser('ycsb')
+        self.registry.register('ycsb', FakeParser)
+        self.assertIsInstance(self.registry.get_parser('ycsb'), FakeParser)
+
+
+if __name__ == '__main__':
+    unittest.main()
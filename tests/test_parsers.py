@@ -0,0 +1,340 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import json
+import unittest
+
+from benchsuite.stdlib.benchmark.parsers import WebFrameworksBenchmarksParser, SysbenchResultParser, \
+    IPerfResultParser, YCSBResultParser, FileBenchResultParser, DaCapoResultParser
+
+
+def logs(stdout):
+    return [{'vm': 'default', 'stdout': stdout, 'stderr': ''}]
+
+
+class WebFrameworksBenchmarksParserTest(unittest.TestCase):
+
+    def get_stdout(self, results):
+        return 'Running tests\n{0}\n{1}\n{2}\ndone\n'.format(
+            WebFrameworksBenchmarksParser.start_marker,
+            json.dumps(results, indent=2),
+            WebFrameworksBenchmarksParser.end_marker)
+
+    def test_single_test(self):
+        results = {
+            'concurrencyLevels': [16, 32],
+            'rawData': {'json': {'flask': [
+                {'totalRequests': 1000, 'latencyAvg': '1.50ms', 'latencyMax': '1.2s', 'startTime': 10, 'endTime': 25},
+                {'totalRequests': 1800, 'latencyAvg': '800us', 'timeout': 3}
+            ]}}
+        }
+        metrics = WebFrameworksBenchmarksParser().get_metrics('tool', 'json', logs(self.get_stdout(results)))
+        self.assertEqual(metrics['totalRequests_16'], {'value': 1000, 'unit': 'num'})
+        self.assertEqual(metrics['duration_16'], {'value': 15, 'unit': 's'})
+        self.assertEqual(metrics['latencyMax_16'], {'value': 1200, 'unit': 'ms'})
+        self.assertAlmostEqual(metrics['latencyAvg_32']['value'], 0.8)
+        self.assertEqual(metrics['timeout_32'], {'value': 3, 'unit': 'num'})
+
+    def test_iterations_keys(self):
+        # cachedQueryIntervals is not written by older versions of the tool
+        results = {
+            'concurrencyLevels': [16],
+            'queryIntervals': [1, 20],
+            'pipelineConcurrencyLevels': [256],
+            'rawData': {
+                'cached_query': {'flask': [{'totalRequests': 10}, {'totalRequests': 20}]},
+                'plaintext': {'flask': [{'totalRequests': 30}]},
+                'fortune': {'flask': [{'totalRequests': 40}]},
+                'db': {}
+            }
+        }
+        metrics = WebFrameworksBenchmarksParser().get_metrics('tool', 'all', logs(self.get_stdout(results)))
+        self.assertEqual({k: v['value'] for k, v in metrics.items()}, {
+            'flask_cached_query_totalRequests_1': 10,
+            'flask_cached_query_totalRequests_20': 20,
+            'flask_plaintext_totalRequests_256': 30,
+            'flask_fortune_totalRequests_16': 40
+        })
+
+    def test_missing_results(self):
+        self.assertRaises(ValueError, WebFrameworksBenchmarksParser().get_metrics, 'tool', 'json', logs('error\n'))
+
+
+SYSBENCH_CPU = '''###cpu###4###
+sysbench 1.0.11 (using system LuaJIT 2.1.0-beta3)
+
+Running the test with following options:
+Number of threads: 4
+
+[ 1s ] thds: 4 eps: 1418.71 lat (ms,95%): 3.02
+CPU speed:
+    events per second:  1425.35
+
+General statistics:
+    total time:                          10.0015s
+    total number of events:              14257
+
+Latency (ms):
+         min:                                  2.67
+         avg:                                  2.80
+         max:                                 10.21
+         95th percentile:                      3.02
+         sum:                              39970.51
+
+Threads fairness:
+    events (avg/stddev):           3564.2500/4.21
+    execution time (avg/stddev):   9.9926/0.00
+###END###
+'''
+
+SYSBENCH_MEMORY = '''###memory###1###
+Total operations: 104857600 (8740397.63 per second)
+
+102400.00 MiB transferred (8535.54 MiB/sec)
+###END###
+###memory###2###
+Total operations: 10 (1.0 per second)
+'''
+
+
+class SysbenchResultParserTest(unittest.TestCase):
+
+    def test_cpu(self):
+        metrics = SysbenchResultParser().get_metrics('sysbench', 'cpu', logs(SYSBENCH_CPU))
+        self.assertEqual({k: v['value'] for k, v in metrics.items()}, {
+            'events_rate_4': 1425.35, 'total_time_4': 10.0015, 'events_4': 14257,
+            'latency_min_4': 2.67, 'latency_avg_4': 2.80, 'latency_max_4': 10.21,
+            'latency_95_4': 3.02, 'latency_sum_4': 39970.51,
+            'events_per_thread_avg_4': 3564.25, 'events_per_thread_stddev_4': 4.21,
+            'exec_time_per_thread_avg_4': 9.9926, 'exec_time_per_thread_stddev_4': 0
+        })
+        self.assertEqual(metrics['latency_95_4']['unit'], 'ms')
+
+    def test_memory(self):
+        # the metrics of the executions not terminated are discarded
+        metrics = SysbenchResultParser().get_metrics('sysbench', 'memory', logs(SYSBENCH_MEMORY))
+        self.assertEqual(metrics, {
+            'operations_1': {'value': 104857600, 'unit': 'num'},
+            'operations_rate_1': {'value': 8740397.63, 'unit': 'ops/s'},
+            'transferred_1': {'value': 102400, 'unit': 'MiB'},
+            'transfer_rate_1': {'value': 8535.54, 'unit': 'MiB/s'}
+        })
+
+
+def iperf_rows(*rows):
+    return ''.join(['20180101120000,10.0.0.1,5001,10.0.0.2,40000,' + r + '\n' for r in rows])
+
+
+class IPerfResultParserTest(unittest.TestCase):
+
+    def get_metrics(self, workload, stdout):
+        metrics = IPerfResultParser().get_metrics('iperf', workload, logs(stdout))
+        return {k: v['value'] for k, v in metrics.items()}
+
+    def test_tcp_intervals(self):
+        # iperf -y c -i 1 -t 3
+        stdout = iperf_rows('3,0.0-1.0,1000,8000', '3,1.0-2.0,1125,9000', '3,2.0-3.0,875,7000', '3,0.0-3.0,3000,8000')
+        self.assertEqual(self.get_metrics('tcp', stdout), {
+            'transferred_1': 3000, 'bandwidth_1': 8000,
+            'bandwidth_min': 7000, 'bandwidth_max': 9000,
+            'bandwidth_p50': 8000, 'bandwidth_p95': 8900, 'bandwidth_p99': 8980
+        })
+
+    def test_tcp_parallel(self):
+        # iperf -y c -P 2 -i 1 -t 2
+        stdout = iperf_rows('4,0.0-1.0,500,4000', '3,0.0-1.0,600,4800', '-1,0.0-1.0,1100,8800',
+                            '4,1.0-2.0,700,5600', '3,1.0-2.0,500,4000', '-1,1.0-2.0,1200,9600',
+                            '4,0.0-2.0,1200,4800', '3,0.0-2.0,1100,4400', '-1,0.0-2.0,2300,9200')
+        metrics = self.get_metrics('tcp', stdout)
+        self.assertEqual(metrics['transferred_1'], 1200)
+        self.assertEqual(metrics['bandwidth_2'], 4400)
+        self.assertEqual(metrics['transferred_sum'], 2300)
+        self.assertEqual(metrics['bandwidth_sum'], 9200)
+        self.assertEqual(metrics['bandwidth_max_1'], 5600)
+        self.assertEqual(metrics['bandwidth_min_2'], 4000)
+        self.assertEqual(metrics['bandwidth_min'], 8800)
+        self.assertEqual(metrics['bandwidth_max'], 9600)
+
+    def test_udp(self):
+        # iperf -y c -u: the client report is followed by the server report
+        stdout = iperf_rows('3,0.0-10.0,1250000,1000000', '3,0.0-10.0,1250000,1000000,0.050,5,850,0.588,0')
+        metrics = self.get_metrics('udp', stdout)
+        self.assertEqual(metrics['total_datagrams_1'], 850)
+        self.assertEqual(metrics['lost_datagrams1'], 5)
+        self.assertEqual(metrics['jitter_1'], 0.05)
+        self.assertEqual(metrics['jitter_p50'], 0.05)
+        self.assertAlmostEqual(metrics['loss_ratio'], 5 / 850)
+        self.assertNotIn('bandwidth_p50', metrics)
+
+    def test_empty(self):
+        self.assertEqual(self.get_metrics('tcp', 'connect failed: Connection refused\n'), {})
+
+
+YCSB_STDOUT = '''[OVERALL], RunTime(ms), 10000.0
+[OVERALL], Throughput(ops/sec), 1000.0
+[READ], Operations, 5000.0
+[READ], AverageLatency(us), 300.5
+[READ], MinLatency(us), 100.0
+[READ], MaxLatency(us), 5000.0
+[READ], 95thPercentileLatency(us), 600.0
+[READ], 99thPercentileLatency(us), 900.0
+[READ], Return=OK, 5000
+[READ], 0, 4000
+[READ], 1, 900
+[READ], 2, 100
+[READ], >3, 0
+[UPDATE], Operations, 5000.0
+[UPDATE], AverageLatency(us), 400.0
+[UPDATE], 99.9PercentileLatency(us), 1200.0
+[INSERT], Operations, 2.0
+[INSERT], 0, 350.2
+[INSERT], 1000, 300.1
+'''
+
+YCSB_STDERR = '''Loading workload...
+2018-01-01 12:00:00:000 0 sec: 0 operations; est completion in 0 seconds
+2018-01-01 12:00:10:000 10 sec: 9000 operations; 900 current ops/sec; [READ: Count=4500]
+2018-01-01 12:00:20:000 20 sec: 19000 operations; 1000 current ops/sec; [READ: Count=5000]
+2018-01-01 12:00:30:000 30 sec: 30000 operations; 1100 current ops/sec; [READ: Count=5500]
+'''
+
+
+class YCSBResultParserTest(unittest.TestCase):
+
+    def test_metrics(self):
+        logs = [{'vm': 'default', 'stdout': YCSB_STDOUT, 'stderr': YCSB_STDERR}]
+        metrics = {k: v['value'] for k, v in YCSBResultParser().get_metrics('ycsb', 'workloada', logs).items()}
+        self.assertEqual(metrics['ops_throughput'], 1000)
+        self.assertEqual(metrics['read_ops'], 5000)
+        self.assertEqual(metrics['read_latency_95'], 600)
+        self.assertEqual(metrics['update_latency_p99_9'], 1200)
+        self.assertEqual(metrics['insert_ops'], 2)
+
+        # from the histogram (1 ms buckets)
+        self.assertAlmostEqual(metrics['read_latency_p50'], 625)
+        self.assertAlmostEqual(metrics['read_latency_p90'], 1000 + 500 / 900 * 1000)
+        self.assertAlmostEqual(metrics['read_latency_p99_9'], 2950)
+
+        # from the status lines
+        self.assertEqual(metrics['ops_throughput_min'], 900)
+        self.assertEqual(metrics['ops_throughput_p50'], 1000)
+        self.assertAlmostEqual(metrics['ops_throughput_p95'], 1090)
+
+    def test_report(self):
+        report = YCSBResultParser().parse(YCSB_STDOUT, YCSB_STDERR)
+        self.assertEqual(list(report.timeseries['insert'][0]), [0, 1000])
+        self.assertEqual(list(report.histograms['read'].counts), [4000, 900, 100])
+        self.assertNotIn('insert', report.histograms)
+        self.assertEqual(list(report.status[1]), [9000, 19000, 30000])
+
+
+FILEBENCH_14 = '''Filebench Version 1.4.9.1
+ 4242: 0.000: Allocated 170MB of shared memory
+ 4242: 0.052: Running...
+ 4242: 30.123: Run took 30 seconds...
+ 4242: 30.123: Per-Operation Breakdown
+statfile1            1603ops/s   0.0mb/s      0.2ms/op      125us/op-cpu [0ms - 10ms]
+deletefile1          1603ops/s   0.0mb/s      0.7ms/op      147us/op-cpu [0ms - 12ms]
+ 4242: 30.123: IO Summary: 20567 ops, 685.502 ops/s, (53/58 r/w), 13.8mb/s, 455us cpu/op, 0.2ms latency
+ 4242: 30.124: Shutting down processes
+'''
+
+FILEBENCH_15 = '''Filebench Version 1.5-alpha3
+0.000: Allocated 177MB of shared memory
+0.050: Running...
+10.050: 10240 ops 1024.000 ops/s 79/158 rd/wr 19.7mb/s 0.2ms/op
+20.050: 20480 ops 2048.000 ops/s 158/316 rd/wr 39.5mb/s 0.2ms/op
+20.051: Run took 20 seconds...
+20.051: Per-Operation Breakdown
+closefile4           1580ops      158ops/s   0.0mb/s    0.010ms/op [0.00ms - 0.15ms]
+readfile4            1580ops      158ops/s  19.6mb/s    0.100ms/op [0.02ms - 2.44ms]
+20.051: IO Summary: 20567 ops 2056.502 ops/s 158/316 rd/wr  39.5mb/s 0.2ms/op
+20.051: Shutting down processes
+'''
+
+
+class FileBenchResultParserTest(unittest.TestCase):
+
+    def get_metrics(self, stdout):
+        metrics = FileBenchResultParser().get_metrics('filebench', 'fileserver', logs(stdout))
+        return {k: v['value'] for k, v in metrics.items()}
+
+    def test_filebench_14(self):
+        self.assertEqual(self.get_metrics(FILEBENCH_14), {
+            'ops': 20567, 'ops_throughput': 685.502, 'throughput': 13.8, 'cputime': 455, 'latency_avg': 0.2,
+            'statfile1_ops_throughput': 1603, 'statfile1_throughput': 0, 'statfile1_latency_avg': 0.2,
+            'statfile1_cputime': 125, 'statfile1_latency_min': 0, 'statfile1_latency_max': 10,
+            'deletefile1_ops_throughput': 1603, 'deletefile1_throughput': 0, 'deletefile1_latency_avg': 0.7,
+            'deletefile1_cputime': 147, 'deletefile1_latency_min': 0, 'deletefile1_latency_max': 12
+        })
+
+    def test_filebench_15(self):
+        metrics = self.get_metrics(FILEBENCH_15)
+        self.assertEqual(metrics['ops'], 20567)
+        self.assertEqual(metrics['ops_throughput'], 2056.502)
+        self.assertEqual(metrics['throughput'], 39.5)
+        self.assertEqual(metrics['latency_avg'], 0.2)
+        self.assertNotIn('cputime', metrics)
+        self.assertEqual(metrics['readfile4_ops'], 1580)
+        self.assertEqual(metrics['readfile4_throughput'], 19.6)
+        self.assertEqual(metrics['readfile4_latency_avg'], 0.1)
+        self.assertEqual(metrics['readfile4_latency_max'], 2.44)
+        self.assertEqual(metrics['closefile4_latency_min'], 0)
+
+        # the periodic statistics
+        self.assertEqual(metrics['ops_throughput_min'], 1024)
+        self.assertEqual(metrics['ops_throughput_max'], 2048)
+        self.assertEqual(list(FileBenchResultParser().parse(FILEBENCH_15).progress[0]), [10.05, 20.05])
+
+    def test_missing_summary(self):
+        self.assertRaises(ValueError, self.get_metrics, 'Filebench Version 1.5-alpha3\nError\n')
+
+
+DACAPO_STDERR = '''===== DaCapo 9.12 h2 starting warmup 1 =====
+===== DaCapo 9.12 h2 completed warmup 1 in 5000 msec =====
+===== DaCapo 9.12 h2 starting warmup 2 =====
+===== DaCapo 9.12 h2 completed warmup 2 in 3100 msec =====
+===== DaCapo 9.12 h2 starting warmup 3 =====
+===== DaCapo 9.12 h2 completed warmup 3 in 3000 msec =====
+===== DaCapo 9.12 h2 starting =====
+===== DaCapo 9.12 h2 PASSED in 3050 msec =====
+'''
+
+
+class DaCapoResultParserTest(unittest.TestCase):
+
+    def test_metrics(self):
+        logs = [{'vm': 'default', 'stdout': '', 'stderr': DACAPO_STDERR}]
+        metrics = {k: v['value'] for k, v in DaCapoResultParser().get_metrics('dacapo', 'h2', logs).items()}
+        self.assertEqual(metrics['timed_duration'], 3050)
+        self.assertEqual(metrics['warmup_iters'], 3)
+        self.assertEqual(metrics['warmup_time'], 11100)
+        self.assertEqual(metrics['first_iter_duration'], 5000)
+        self.assertAlmostEqual(metrics['first_iter_penalty'], 5000 / 3050)
+        self.assertEqual(metrics['steady_state_iter'], 2)
+        self.assertEqual(metrics['time_to_steady_state'], 5000)
+        self.assertAlmostEqual(metrics['duration_cv'], (5000 / 3) ** 0.5 / 3050)
+
+    def test_not_passed(self):
+        self.assertRaises(ValueError, DaCapoResultParser().parse,
+                          '===== DaCapo 9.12 h2 completed warmup 1 in 5000 msec =====\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
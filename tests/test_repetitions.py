@@ -0,0 +1,107 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import unittest
+
+from benchsuite.stdlib.benchmark.repetitions import t_critical, get_statistics, RepeatedRun
+
+
+# two-sided critical values of the Student's t distribution
+T_TABLE = {
+    0.90: {1: 6.314, 2: 2.920, 3: 2.353, 4: 2.132, 5: 2.015, 9: 1.833, 10: 1.812, 30: 1.697},
+    0.95: {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 9: 2.262, 10: 2.228, 30: 2.042, 100: 1.984},
+    0.99: {1: 63.657, 2: 9.925, 3: 5.841, 4: 4.604, 5: 4.032, 9: 3.250, 10: 3.169, 30: 2.750}
+}
+
+
+class FakeBenchmark:
+    """
+    a benchmark whose runs last the given durations
+    """
+
+    tool_id = 'tool'
+    workload_id = 'workload'
+    parser = None
+
+    def __init__(self, durations):
+        self.durations = list(durations)
+        self.runs = 0
+
+    def execute(self, execution, on_output=None):
+        self.runs += 1
+
+    def get_runtime(self, execution, phase):
+        return self.durations[self.runs - 1]
+
+
+class TCriticalTest(unittest.TestCase):
+
+    def test_table(self):
+        for confidence, values in T_TABLE.items():
+            for df, expected in values.items():
+                self.assertAlmostEqual(t_critical(confidence, df), expected, places=3,
+                                       msg='confidence {0}, df {1}'.format(confidence, df))
+
+    def test_decreasing_with_df(self):
+        values = [t_critical(0.95, df) for df in range(1, 50)]
+        self.assertEqual(values, sorted(values, reverse=True))
+        self.assertGreater(values[-1], 1.959964)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, t_critical, 1, 5)
+        self.assertRaises(ValueError, t_critical, 0.95, 0)
+
+
+class StatisticsTest(unittest.TestCase):
+
+    def test_confidence_interval(self):
+        values = [10, 11, 9, 10, 12, 8, 10, 11, 9, 10]
+        s = get_statistics(values, 0.95)
+        half_width = 2.262 * s['stddev'] / 10 ** 0.5
+        self.assertEqual(s['n'], 10)
+        self.assertAlmostEqual(s['mean'], 10)
+        self.assertAlmostEqual(s['ci_low'], 10 - half_width, places=3)
+        self.assertAlmostEqual(s['ci_high'], 10 + half_width, places=3)
+
+    def test_single_value(self):
+        s = get_statistics([5.0])
+        self.assertIsNone(s['ci_low'])
+        self.assertIsNone(s['ci_relative_width'])
+
+
+class RepeatedRunTest(unittest.TestCase):
+
+    def test_stops_when_stable(self):
+        # the interval is wider than 15% of the mean until the sixth run (df 5)
+        benchmark = FakeBenchmark([10, 11, 9, 10.4, 9.6, 10, 10, 10])
+        res = RepeatedRun(min_runs=3, max_runs=8, ci_relative_width=0.15).run(benchmark, None)
+        self.assertTrue(res['stopped_early'])
+        self.assertEqual(len(res['runs']), 6)
+        self.assertEqual(res['metrics']['repetitions']['value'], 6)
+        self.assertAlmostEqual(res['metrics']['duration_mean']['value'], 10)
+
+    def test_max_runs(self):
+        benchmark = FakeBenchmark([1, 10, 1, 10, 1])
+        res = RepeatedRun(min_runs=2, max_runs=5).run(benchmark, None)
+        self.assertFalse(res['stopped_early'])
+        self.assertEqual(len(res['runs']), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import configparser
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchsuite.stdlib.benchmark.vm_benchmark import BashCommandBenchmark
+from benchsuite.stdlib.execution.sshexecutor import RemoteSSHExecutor
+from benchsuite.stdlib.execution.vm_environment import VM
+
+from local_ssh import patch_ssh, new_execution
+
+
+CONFIG = '''
+[DEFAULT]
+install = echo install >> {0}/log; echo installed > tool; echo installing
+execute = cat tool; echo run %(n)s >> {0}/log
+cleanup = echo cleanup %(n)s >> {0}/log
+n = 0
+
+[first]
+n = 1
+
+[second]
+n = 2
+'''
+
+
+class RemoteSSHExecutorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.vm = VM('default', 'id', '127.0.0.1', 'user', 'ubuntu', working_dir=self.dir)
+        self.patchers = patch_ssh()
+        for p in self.patchers:
+            p.start()
+        self.executions = []
+
+    def tearDown(self):
+        for e in self.executions:
+            RemoteSSHExecutor(e).remove_files()
+        for p in self.patchers:
+            p.stop()
+        shutil.rmtree(self.dir)
+
+    def new_execution(self, workload, config=CONFIG, session_props=None):
+        c = configparser.ConfigParser()
+        c.read_string(config.format(self.dir))
+        b = BashCommandBenchmark.load_from_config_file(c, 'tool', workload)
+        e = new_execution(b, {'default': self.vm}, session_props=session_props)
+        self.executions.append(e)
+        return e
+
+    def read_log(self):
+        with open(os.path.join(self.dir, 'log')) as f:
+            return f.read().split('\n')[:-1]
+
+    def run_execution(self, e):
+        e.test.prepare(e)
+        e.test.execute(e)
+        stdout = e.test.get_result(e)[0]['stdout']
+        e.test.cleanup(e)
+        return stdout
+
+    def test_second_execution_skips_install(self):
+        self.assertEqual(self.run_execution(self.new_execution('first')), 'installed\n')
+        self.assertEqual(self.run_execution(self.new_execution('second')), 'installed\n')
+        self.assertEqual(self.read_log(), ['install', 'run 1', 'cleanup 1', 'run 2', 'cleanup 2'])
+
+    def test_uninstall_invalidates_the_cache(self):
+        config = CONFIG.replace('n = 0\n', 'n = 0\nuninstall = echo uninstall >> {0}/log\n')
+        e = self.new_execution('first', config=config)
+        self.run_execution(e)
+        e.test.uninstall(e)
+        self.run_execution(self.new_execution('second', config=config))
+        self.assertEqual(self.read_log(), ['install', 'run 1', 'cleanup 1', 'uninstall',
+                                           'install', 'run 2', 'cleanup 2'])
+
+    def test_uninstall_without_script(self):
+        e = self.new_execution('first')
+        self.run_execution(e)
+        with mock.patch('benchsuite.stdlib.execution.sshexecutor.run_ssh_cmd') as run:
+            e.test.uninstall(e)
+            run.assert_not_called()
+        self.run_execution(self.new_execution('second'))
+        self.assertEqual(self.read_log(), ['install', 'run 1', 'cleanup 1', 'run 2', 'cleanup 2'])
+
+    def test_runtime_of_repeated_run(self):
+        config = CONFIG.replace('execute = ', 'execute = test -f run || {{ sleep 1; touch run; }}; ')
+        e = self.new_execution('first', config=config)
+        e.test.prepare(e)
+        e.test.execute(e)
+        self.assertGreaterEqual(e.test.get_runtime(e, 'run'), 1)
+
+        # without the timestamps (date does not support %N), the runtime is
+        # read from the vm
+        os.mkdir(os.path.join(self.dir, 'bin'))
+        with open(os.path.join(self.dir, 'bin', 'date'), 'w') as f:
+            f.write('#!/bin/sh\necho N\n')
+        os.chmod(os.path.join(self.dir, 'bin', 'date'), 0o755)
+        with mock.patch.dict(os.environ, {'PATH': os.path.join(self.dir, 'bin') + ':' + os.environ['PATH']}):
+            e.test.execute(e)
+        self.assertLess(e.test.get_runtime(e, 'run'), 1)
+
+    def test_force_reinstall_option(self):
+        self.run_execution(self.new_execution('first'))
+        config = CONFIG.replace('n = 2\n', 'n = 2\nforce_reinstall = true\n')
+        self.run_execution(self.new_execution('second', config=config))
+        self.run_execution(self.new_execution('first', session_props={'use_install_cache': 'false'}))
+        self.assertEqual(self.read_log(), ['install', 'run 1', 'cleanup 1', 'install', 'run 2', 'cleanup 2',
+                                           'install', 'run 1', 'cleanup 1'])
+
+    def test_telemetry_option(self):
+        e = self.new_execution('first', session_props={'telemetry': 'true', 'telemetry_interval': '0.5'})
+        self.run_execution(e)
+        self.assertIn('telemetry', e.test.get_result(e)[0])
+        self.assertTrue(e.test.parser)
+
+        e = self.new_execution('second')
+        self.run_execution(e)
+        self.assertNotIn('telemetry', e.test.get_result(e)[0])
+        self.assertFalse(e.test.parser)
+
+    def test_live_log_option(self):
+        e = self.new_execution('first', session_props={'live_log': 'true'})
+        with self.assertLogs('benchsuite.stdlib.execution.sshexecutor', 'INFO') as logs:
+            self.run_execution(e)
+        lines = [l for l in logs.output if '[default:' in l]
+        self.assertEqual(lines, ['INFO:benchsuite.stdlib.execution.sshexecutor:[default:stdout] installed'])
+
+    def test_get_option(self):
+        e = self.new_execution('first', session_props={'telemetry_phases': 'install, run'})
+        executor = RemoteSSHExecutor(e)
+        self.assertEqual(executor.get_option('telemetry_phases'), ['install', 'run'])
+        self.assertIs(executor.get_option('force_reinstall'), False)
+
+
+if __name__ == '__main__':
+    unittest.main()
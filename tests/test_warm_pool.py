@@ -0,0 +1,110 @@
+# Benchmarking Suite
+# Copyright 2014-2017 Engineering Ingegneria Informatica S.p.A.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+#
+# Developed in the ARTIST EU project (www.artist-project.eu) and in the
+# CloudPerfect EU project (https://cloudperfect.eu/)
+
+import configparser
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from benchsuite.stdlib.benchmark.vm_benchmark import BashCommandBenchmark
+from benchsuite.stdlib.execution.vm_environment import VM
+from benchsuite.stdlib.util.warm_pool import WarmVMPool
+
+from local_ssh import patch_ssh, new_execution, run_local
+
+
+class WarmVMPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.patchers = patch_ssh() + [
+            mock.patch('benchsuite.stdlib.util.warm_pool.run_ssh_cmd', run_local),
+            mock.patch('benchsuite.stdlib.util.warm_pool.run_ssh_cmd_single', run_local)
+        ]
+        for p in self.patchers:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patchers:
+            p.stop()
+        shutil.rmtree(self.dir)
+
+    def new_pool(self, **kwargs):
+        return WarmVMPool(os.path.join(self.dir, 'pool.json'), **kwargs)
+
+    def new_vm(self, id):
+        return VM('default', id, '127.0.0.1', 'user', 'ubuntu', working_dir=os.path.join(self.dir, 'vm'))
+
+    def test_release_evicts_expired(self):
+        pool = self.new_pool(max_size=2, idle_ttl=-1)
+        self.assertEqual(pool.release('key', self.new_vm('vm1')), (True, []))
+        added, evicted = pool.release('key', self.new_vm('vm2'))
+        self.assertTrue(added)
+        self.assertEqual([vm.id for vm in evicted], ['vm1'])
+        self.assertEqual(pool.size('key'), 1)
+
+    def test_purge(self):
+        pool = self.new_pool(max_size=2)
+        pool.release('key1', self.new_vm('vm1'))
+        pool.release('key2', self.new_vm('vm2'))
+        self.assertEqual(pool.purge(), [])
+        self.assertEqual(sorted([vm.id for vm in pool.purge(drain=True)]), ['vm1', 'vm2'])
+        self.assertEqual(pool.size('key1'), 0)
+
+        pool = self.new_pool(max_size=2, min_size=1, idle_ttl=-1)
+        pool.release('key1', self.new_vm('vm1'))
+        pool.release('key1', self.new_vm('vm2'))
+        self.assertEqual([vm.id for vm in pool.purge()], ['vm1'])
+
+    def test_reset_removes_all_the_executions(self):
+        config = configparser.ConfigParser()
+        config.read_string('''
+[DEFAULT]
+install = echo installed > tool
+execute = cat tool
+cleanup = rm -f out
+uninstall = rm tool
+
+[first]
+
+[second]
+''')
+        vm = self.new_vm('vm1')
+        os.mkdir(vm.working_dir)
+        for workload in ['first', 'second']:
+            e = new_execution(BashCommandBenchmark.load_from_config_file(config, 'tool', workload), {'default': vm})
+            e.test.prepare(e)
+            e.test.execute(e)
+            e.test.cleanup(e)
+
+        ids = vm.execution_ids
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(len(os.listdir(vm.working_dir)), 3)
+
+        self.assertEqual(self.new_pool(max_size=1).release('key', vm), (True, []))
+        self.assertEqual(os.listdir(vm.working_dir), [])
+        self.assertEqual([f for i in ids for f in glob.glob('/tmp/*-{0}.*'.format(i))], [])
+        self.assertEqual(vm.execution_ids, [])
+
+
+if __name__ == '__main__':
+    unittest.main()